@@ -3,6 +3,25 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
+try:
+    import orjson
+except ImportError:
+    # Fall back to SQLAlchemy's default stdlib json encoding
+    orjson = None
+
+
+def _orjson_dumps(value) -> str:
+    # Compact encoding; non-str keys are stringified like the stdlib encoder does
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# Faster, compact (no whitespace) encoding for all JSON columns
+json_engine_args = (
+    {"json_serializer": _orjson_dumps, "json_deserializer": orjson.loads}
+    if orjson is not None
+    else {}
+)
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./crystal_trade.db")
 
 # Check if using PostgreSQL (production) or SQLite (local)
@@ -19,7 +38,9 @@ if is_postgres:
         pool_pre_ping=True,  # Verify connections before using
         pool_size=5,  # Connection pool size
         max_overflow=10,  # Max overflow connections
-        echo=False  # Disable SQL logging for performance
+        echo=False,  # Disable SQL logging for performance
+        insertmanyvalues_page_size=500,  # Rows per multi-row INSERT for bulk inserts
+        **json_engine_args,
     )
 else:
     # SQLite configuration for local development
@@ -31,7 +52,9 @@ else:
         DATABASE_URL, 
         connect_args=connect_args,
         pool_pre_ping=True,  # Verify connections before using
-        echo=False  # Disable SQL logging for performance
+        echo=False,  # Disable SQL logging for performance
+        insertmanyvalues_page_size=500,  # Rows per multi-row INSERT for bulk inserts
+        **json_engine_args,
     )
     
     # Enable WAL mode for SQLite (better concurrency)
@@ -363,7 +363,7 @@ async def upload_document(file: UploadFile = File(...), loan_name: Optional[str]
             f.write(content)
         
         # Process document
-        document_data = await document_processor.process_document(file_path, file.filename)
+        document_data = document_processor.process_document(file_path, file.filename)
         
         # Create analysis record
         analysis_id = str(uuid.uuid4())
@@ -431,12 +431,12 @@ async def process_analysis(analysis_id: str):
         )
         
         # Step 4: Risk Scoring
-        risk_assessment = await due_diligence_engine.calculate_risk_score(
+        risk_assessment = due_diligence_engine.calculate_risk_score(
             ai_results, compliance_results
         )
         
         # Step 5: Generate Recommendations
-        recommendations = await due_diligence_engine.generate_recommendations(
+        recommendations = due_diligence_engine.generate_recommendations(
             risk_assessment, compliance_results
         )
         
@@ -830,20 +830,20 @@ async def get_lma_deviations(analysis_id: str):
         # Save deviations to database
         for deviation in result["deviations"]:
             # Check if deviation already exists (by id)
-            existing = db.query(LMADeviation).filter(LMADeviation.id == deviation.get("id")).first()
+            existing = db.query(LMADeviation).filter(LMADeviation.id == deviation.id).first()
             if not existing:
                 lma_dev = LMADeviation(
-                    id=deviation.get("id", str(uuid.uuid4())),
+                    id=deviation.id,
                     analysis_id=analysis_id,
-                    document_id=deviation.get("document_id", ""),
-                    clause_text=deviation.get("clause_text", ""),
-                    clause_type=deviation.get("clause_type", ""),
-                    deviation_severity=deviation.get("deviation_severity", "low"),
-                    market_impact=deviation.get("market_impact", ""),
-                    baseline_template=deviation.get("baseline_template", ""),
-                    confidence=deviation.get("confidence", 0.0),
-                    page_reference=deviation.get("page_reference", ""),
-                    section_reference=deviation.get("section_reference", ""),
+                    document_id=deviation.document_id,
+                    clause_text=deviation.clause_text,
+                    clause_type=deviation.clause_type,
+                    deviation_severity=deviation.deviation_severity,
+                    market_impact=deviation.market_impact,
+                    baseline_template=deviation.baseline_template,
+                    confidence=deviation.confidence,
+                    page_reference=deviation.page_reference,
+                    section_reference=deviation.section_reference,
                 )
                 db.add(lma_dev)
         
@@ -853,21 +853,21 @@ async def get_lma_deviations(analysis_id: str):
         transformed_deviations = []
         for deviation in result["deviations"]:
             transformed_deviations.append({
-                "id": deviation.get("id"),
-                "clause_type": deviation.get("clause_type", "Unknown"),
-                "severity": deviation.get("deviation_severity", "low"),  # Map to frontend expected field
-                "deviation_severity": deviation.get("deviation_severity", "low"),  # Keep for compatibility
-                "market_impact": deviation.get("market_impact", "No impact assessment available"),
-                "clause_text": deviation.get("clause_text", ""),
-                "clause_reference": deviation.get("section_reference") or deviation.get("page_reference") or None,
+                "id": deviation.id,
+                "clause_type": deviation.clause_type,
+                "severity": deviation.deviation_severity,  # Map to frontend expected field
+                "deviation_severity": deviation.deviation_severity,  # Keep for compatibility
+                "market_impact": deviation.market_impact,
+                "clause_text": deviation.clause_text,
+                "clause_reference": deviation.section_reference or deviation.page_reference or None,
                 "recommendation": _generate_recommendation(
-                    deviation.get("deviation_severity", "low"),
-                    deviation.get("clause_type", ""),
-                    deviation.get("market_impact", "")
+                    deviation.deviation_severity,
+                    deviation.clause_type,
+                    deviation.market_impact
                 ),
-                "deviation_details": deviation.get("baseline_template", ""),
-                "lma_standard": deviation.get("baseline_template", ""),
-                "confidence": deviation.get("confidence", 0.0),
+                "deviation_details": deviation.baseline_template,
+                "lma_standard": deviation.baseline_template,
+                "confidence": deviation.confidence,
             })
         
         return {
@@ -905,7 +905,7 @@ async def get_buyer_fit(analysis_id: str):
     if analysis.status != "completed":
         raise HTTPException(status_code=400, detail="Analysis must be completed")
     
-    result = await buyer_fit_analyzer.analyze_buyer_fit(
+    result = buyer_fit_analyzer.analyze_buyer_fit(
         analysis_id,
         analysis.extracted_terms or {},
         analysis.compliance_checks or [],
@@ -1070,7 +1070,7 @@ async def create_auction(auction_config: dict):
         raise HTTPException(status_code=403, detail="Feature not enabled")
     
     db = next(get_db())
-    auction_data = await auction_service.create_auction(
+    auction_data = auction_service.create_auction(
         auction_config.get("analysis_id", ""),
         auction_config,
         auction_config.get("created_by", "demo_user"),
@@ -1353,7 +1353,7 @@ async def get_auction_leaderboard(auction_id: str):
         "auction_type": auction.auction_type,
     }
     
-    leaderboard = await auction_service.get_auction_leaderboard(auction_dict, bids_data)
+    leaderboard = auction_service.get_auction_leaderboard(auction_dict, bids_data)
     
     return {"leaderboard": leaderboard}
 
@@ -1388,7 +1388,7 @@ async def close_auction(auction_id: str):
         for b in bids
     ]
     
-    result = await auction_service.close_auction(auction_dict, bids_data)
+    result = auction_service.close_auction(auction_dict, bids_data)
     
     # Update auction
     auction.status = "closed"
@@ -1,17 +1,150 @@
 import os
 from typing import Dict, List, Optional
-from openai import OpenAI
 try:
     from langchain_text_splitters import RecursiveCharacterTextSplitter
 except ImportError:
     # Fallback for older langchain versions
     from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_core.messages import SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
+import asyncio
 import json
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", ""))
+# Upper bound on concurrent per-chunk LLM calls (respects API rate limits)
+MAX_CONCURRENT_LLM_CALLS = 5
+
+# Shared system prompt for every analysis call. It is deliberately long (>1024 tokens)
+# and identical across requests so OpenAI's automatic prompt caching can reuse it as a
+# prefix; only the user message (document excerpt or partial results) changes per call.
+ANALYSIS_SYSTEM_PROMPT = """You are an expert loan document analyst and credit risk analyst working on the secondary loan market. You review syndicated credit agreements, amendments, assignment agreements and related loan documentation, and you produce structured, machine-readable analysis. Always respond with a single JSON object and nothing else. Do not wrap the JSON in prose. If you use a markdown code fence, use ```json.
+
+You will receive one of two tasks, indicated by the first line of the user message.
+
+TASK: EXCERPT ANALYSIS
+The user message contains one excerpt of a larger loan document. Documents are split into overlapping excerpts, so a clause may be cut off at the start or end of an excerpt. Analyze only what appears in the excerpt you are given. Do not guess values that are not stated in the excerpt; use null (for single values) or an empty list (for list values) instead.
+
+TASK: MERGE
+The user message contains a JSON array of partial results, one per excerpt of the same loan document, each following the output schema below. Merge them into one consistent result that follows the same schema:
+- For extracted_terms, prefer the most specific non-null value for each key. If excerpts disagree, prefer the value that appears in the operative clause rather than in a definition, recital or schedule example.
+- Combine list values (consent_requirements, financial_covenants) and remove duplicates, including near-duplicates that describe the same party or covenant in different words.
+- Combine all risk_flags and unusual_clauses and remove duplicates. When two entries describe the same issue, keep the one with the more specific description and location, and keep the higher severity.
+
+OUTPUT SCHEMA
+Return a JSON object with exactly these keys:
+
+1. extracted_terms: an object with these keys:
+- interest_rate: string. The margin and reference rate (for example "SOFR + 3.50%"), including any margin ratchet or floor if stated.
+- maturity_date: string. The final maturity or termination date, in YYYY-MM-DD format where possible.
+- principal_amount: string. The facility amount or total commitments, including currency (for example "$50,000,000").
+- transfer_restrictions: string. Describe any limitations on assignment or transfer: whether assignments and/or participations are permitted, to whom (eligible assignees, affiliates, disqualified lenders, competitors), minimum transfer amounts, and whether transfers are prohibited during a default.
+- consent_requirements: array of strings. The parties whose consent is required for a transfer (for example "Administrative Agent", "Borrower", "Majority Lenders"), including any deemed-consent period if stated.
+- financial_covenants: array of objects, one per covenant, each with:
+  - name: string (for example "Leverage Ratio", "Interest Coverage", "Minimum Liquidity")
+  - requirement: string (the threshold, for example "Not to exceed 4.50:1.00")
+  - current_value: string or null (only if the document states a reported or current value)
+
+2. risk_flags: an array of risk objects, each with:
+- category: string, one of "credit", "legal", "operational".
+  - credit: borrower financial condition, leverage, covenant headroom, collateral and guarantee coverage, subordination, payment defaults.
+  - legal: enforceability, governing law and jurisdiction, transfer and consent restrictions, non-standard definitions, sanctions and anti-corruption provisions, amendment and waiver thresholds.
+  - operational: notice and reporting obligations, agent mechanics, settlement and payment mechanics, documentation gaps.
+- severity: string, one of "high", "medium", "low".
+  - high: could prevent a transfer, trigger a default, or materially impair recovery.
+  - medium: likely to delay a transfer or require negotiation or additional diligence.
+  - low: worth noting but consistent with market practice.
+- description: string. One or two sentences explaining the risk and why it matters to a buyer of the loan.
+- location: string. Section, clause or page reference if available, otherwise an empty string.
+
+3. unusual_clauses: an array of strings, each describing one unusual, non-standard, or potentially problematic clause compared with LMA/LSTA market-standard documentation (for example non-standard transfer restrictions, borrower consent that cannot be deemed given, unusual yank-the-bank or snooze-you-lose provisions, bespoke definitions of Permitted Transferee, or covenant definitions with unusual add-backs).
+
+EXAMPLE OUTPUT
+{
+  "extracted_terms": {
+    "interest_rate": "SOFR + 3.50%",
+    "maturity_date": "2028-12-31",
+    "principal_amount": "$50,000,000",
+    "transfer_restrictions": "Assignment permitted to Eligible Assignees with Agent consent; participations permitted without consent",
+    "consent_requirements": ["Administrative Agent", "Borrower"],
+    "financial_covenants": [
+      {"name": "Leverage Ratio", "requirement": "Not to exceed 4.50:1.00", "current_value": null}
+    ]
+  },
+  "risk_flags": [
+    {
+      "category": "legal",
+      "severity": "medium",
+      "description": "Borrower consent is required for assignments and is not deemed given after a fixed period, which may delay settlement.",
+      "location": "Section 10.6(b)"
+    }
+  ],
+  "unusual_clauses": [
+    "Borrower consent to assignments may be withheld in its sole discretion, without a deemed-consent period"
+  ]
+}
+"""
+
+
+def _empty_terms() -> Dict:
+    return {
+        "interest_rate": None,
+        "maturity_date": None,
+        "principal_amount": None,
+        "transfer_restrictions": None,
+        "consent_requirements": [],
+        "financial_covenants": [],
+    }
+
+
+def _empty_results() -> Dict:
+    return {
+        "extracted_terms": _empty_terms(),
+        "risk_flags": [],
+        "unusual_clauses": [],
+    }
+
+
+def _parse_json_content(content: str):
+    """Parse JSON from an LLM response, stripping markdown code fences"""
+    if "```json" in content:
+        json_start = content.find("```json") + 7
+        json_end = content.find("```", json_start)
+        content = content[json_start:json_end].strip()
+    elif "```" in content:
+        json_start = content.find("```") + 3
+        json_end = content.find("```", json_start)
+        content = content[json_start:json_end].strip()
+    return json.loads(content)
+
+
+def _normalize_results(results: Dict) -> Dict:
+    """Ensure analysis results have the expected keys and types"""
+    terms = results.get("extracted_terms")
+    risks = results.get("risk_flags")
+    clauses = results.get("unusual_clauses")
+    return {
+        "extracted_terms": {**_empty_terms(), **terms} if isinstance(terms, dict) else _empty_terms(),
+        "risk_flags": risks if isinstance(risks, list) else [],
+        "unusual_clauses": clauses if isinstance(clauses, list) else [],
+    }
+
+
+def _combine_partials(partials: List[Dict]) -> Dict:
+    """Merge partial results locally: first non-empty scalar wins, lists are concatenated"""
+    combined = _empty_results()
+    terms = combined["extracted_terms"]
+    for partial in map(_normalize_results, partials):
+        for key, value in partial["extracted_terms"].items():
+            if isinstance(value, list):
+                existing = terms.get(key) if isinstance(terms.get(key), list) else []
+                terms[key] = existing + [v for v in value if v not in existing]
+            elif value and not terms.get(key):
+                terms[key] = value
+        combined["risk_flags"].extend(partial["risk_flags"])
+        combined["unusual_clauses"].extend(
+            c for c in partial["unusual_clauses"] if c not in combined["unusual_clauses"]
+        )
+    return combined
 
 
 class AIAnalyzer:
@@ -30,133 +163,68 @@ class AIAnalyzer:
 
     async def analyze_document(self, document_text: str, file_path: str) -> Dict:
         """Analyze document using AI"""
-        # Split document into chunks
+        # Split document into chunks so the whole document is covered
         chunks = self.text_splitter.split_text(document_text)
         
-        # Extract key terms
-        extracted_terms = await self._extract_terms(document_text)
-        
-        # Identify risks
-        risk_flags = await self._identify_risks(document_text)
-        
-        # Check for unusual clauses
-        unusual_clauses = await self._find_unusual_clauses(document_text)
+        # Extract terms, risks and unusual clauses across all chunks
+        results = await self._analyze_all(chunks)
         
         return {
-            "extracted_terms": extracted_terms,
-            "risk_flags": risk_flags,
-            "unusual_clauses": unusual_clauses,
+            "extracted_terms": results["extracted_terms"],
+            "risk_flags": results["risk_flags"],
+            "unusual_clauses": results["unusual_clauses"],
             "document_length": len(document_text),
             "chunks": len(chunks),
         }
 
-    async def _extract_terms(self, text: str) -> Dict:
-        """Extract key loan terms using LLM"""
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an expert loan document analyst. Extract key terms from loan documents and return them in JSON format."),
-            ("user", """Extract the following information from this loan document:
-            
-1. Interest rate (if mentioned)
-2. Maturity date
-3. Principal amount
-4. Transfer restrictions (describe any limitations on assignment/transfer)
-5. Consent requirements (list parties that require consent for transfer)
-6. Financial covenants (list each covenant with its requirement)
-
-Return the results as JSON with these keys: interest_rate, maturity_date, principal_amount, transfer_restrictions, consent_requirements, financial_covenants.
-
-Document text:
-{text}
-"""),
-        ])
-        
-        try:
-            # Use sync invoke for now (can be made async with proper setup)
-            chain = prompt | self.llm
-            response = chain.invoke({"text": text[:8000]})  # Limit text length
-            
-            # Parse JSON response
-            content = response.content
-            # Try to extract JSON from response
-            if "```json" in content:
-                json_start = content.find("```json") + 7
-                json_end = content.find("```", json_start)
-                content = content[json_start:json_end].strip()
-            elif "```" in content:
-                json_start = content.find("```") + 3
-                json_end = content.find("```", json_start)
-                content = content[json_start:json_end].strip()
-            
-            terms = json.loads(content)
-            return terms
-        except Exception as e:
-            print(f"Error extracting terms: {e}")
-            # Return default structure
-            return {
-                "interest_rate": None,
-                "maturity_date": None,
-                "principal_amount": None,
-                "transfer_restrictions": None,
-                "consent_requirements": [],
-                "financial_covenants": [],
-            }
-
-    async def _identify_risks(self, text: str) -> List[Dict]:
-        """Identify potential risks in the document"""
+    async def _analyze_all(self, chunks: List[str]) -> Dict:
+        """Map-reduce analysis: analyze each chunk in parallel, then merge the partial results"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+
+        async def analyze_bounded(chunk: str) -> Optional[Dict]:
+            async with semaphore:
+                return await self._analyze_chunk(chunk)
+
+        partials = await asyncio.gather(*(analyze_bounded(chunk) for chunk in chunks))
+        partials = [p for p in partials if p]
+
+        if not partials:
+            return _empty_results()
+        if len(partials) == 1:
+            return _normalize_results(partials[0])
+        return await self._merge_partials(partials)
+
+    async def _analyze_chunk(self, text: str) -> Optional[Dict]:
+        """Extract terms, risks and unusual clauses from a single document chunk"""
         prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a risk analyst. Identify potential risks in loan documents."),
-            ("user", """Analyze this loan document and identify potential risks. Return a JSON array of risk objects, each with:
-- category: string (credit, legal, operational)
-- severity: string (high, medium, low)
-- description: string
-- location: string (section or page reference if available)
-
-Document text:
-{text}
-"""),
+            SystemMessage(content=ANALYSIS_SYSTEM_PROMPT),
+            ("user", "TASK: EXCERPT ANALYSIS\n\nDocument excerpt:\n{text}"),
         ])
         
         try:
             chain = prompt | self.llm
-            response = chain.invoke({"text": text[:8000]})
-            content = response.content
-            
-            # Extract JSON
-            if "```json" in content:
-                json_start = content.find("```json") + 7
-                json_end = content.find("```", json_start)
-                content = content[json_start:json_end].strip()
-            
-            risks = json.loads(content)
-            return risks if isinstance(risks, list) else []
+            response = await chain.ainvoke({"text": text})
+            results = _parse_json_content(response.content)
+            return results if isinstance(results, dict) else None
         except Exception as e:
-            print(f"Error identifying risks: {e}")
-            return []
+            print(f"Error analyzing document chunk: {e}")
+            return None
 
-    async def _find_unusual_clauses(self, text: str) -> List[str]:
-        """Find unusual or non-standard clauses"""
+    async def _merge_partials(self, partials: List[Dict]) -> Dict:
+        """Merge partial chunk extractions into a single result with one LLM call"""
         prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a loan document expert. Identify unusual or non-standard clauses."),
-            ("user", """Review this loan document and identify any unusual, non-standard, or potentially problematic clauses. Return a JSON array of strings describing each unusual clause.
-
-Document text:
-{text}
-"""),
+            SystemMessage(content=ANALYSIS_SYSTEM_PROMPT),
+            ("user", "TASK: MERGE\n\nPartial extractions:\n{partials}"),
         ])
         
         try:
             chain = prompt | self.llm
-            response = chain.invoke({"text": text[:8000]})
-            content = response.content
-            
-            if "```json" in content:
-                json_start = content.find("```json") + 7
-                json_end = content.find("```", json_start)
-                content = content[json_start:json_end].strip()
-            
-            clauses = json.loads(content)
-            return clauses if isinstance(clauses, list) else []
+            response = await chain.ainvoke({"partials": json.dumps(partials)})
+            merged = _parse_json_content(response.content)
+            if isinstance(merged, dict):
+                return _normalize_results(merged)
         except Exception as e:
-            print(f"Error finding unusual clauses: {e}")
-            return []
-
+            print(f"Error merging chunk extractions: {e}")
+        
+        # Fall back to a simple local merge if the reduce step fails
+        return _combine_partials(partials)
@@ -2,14 +2,165 @@
 Buyer Fit Analyzer
 Rule-based heuristics to identify buyer types (CLO, Bank, Distressed Fund) and fit scores
 """
-from typing import Dict, List, Any
+import re
+from types import MappingProxyType
+from typing import Dict, List, Any, Tuple
+
+
+# Buyer type profiles (static, shared by all analyzer instances)
+_BUYER_PROFILES = MappingProxyType({
+    "CLO": {
+        "preferences": ("covenant_lite", "transferable", "standard_terms"),
+        "avoid": ("high_covenants", "transfer_prohibited"),
+    },
+    "Bank": {
+        "preferences": ("strong_covenants", "standard_terms", "regulatory_compliant"),
+        "avoid": ("covenant_lite", "non_standard"),
+    },
+    "DistressedFund": {
+        "preferences": ("flexible_terms", "default_provisions"),
+        "avoid": (),
+    },
+})
+# Per-buyer-type scoring rules over the shared feature dict. Each rule is
+# (score delta, indicator, reasoning or None); covenant tiers are checked in
+# order and the first tier whose minimum covenant count is met applies.
+_RULES = MappingProxyType({
+    "CLO": {
+        "base_bonus": 0,
+        "covenant_tiers": (
+            # CLOs prefer covenant-lite or moderate covenants
+            (6, -15, "High covenant count - may be restrictive for CLOs",
+             "High number of covenants may limit CLO flexibility"),
+            (4, 10, "Moderate covenants", None),
+            (0, 20, "Covenant-lite structure",
+             "Low covenant count aligns with CLO preferences"),
+        ),
+        # CLOs prefer transferable loans
+        "transfer_prohibited": (-30, "Transfer prohibited - major blocker",
+                                "Transfer prohibition is a critical issue for CLOs"),
+        "transfer_assign": (15, "Transfer provisions present",
+                            "Transfer provisions allow CLO flexibility"),
+        # CLOs prefer standard LMA terms
+        "compliance_clean": (10, "Standard LMA compliance", None),
+    },
+    "Bank": {
+        "base_bonus": 0,
+        "covenant_tiers": (
+            # Banks prefer strong covenants
+            (3, 20, "Strong covenant package",
+             "Covenants provide bank with monitoring tools"),
+            (1, 10, "Some covenants present", None),
+            (0, -10, "Covenant-lite - may be less attractive to banks",
+             "Banks typically prefer covenant protection"),
+        ),
+        # Banks are more flexible on transfer restrictions
+        "transfer_open": (10, "Transferable structure", None),
+    },
+    "DistressedFund": {
+        # Distressed funds are more flexible on terms
+        "base_bonus": 15,
+        "default_provisions": (15, "Default/restructuring provisions present",
+                               "Distressed funds specialize in these situations"),
+        # Transfer restrictions less critical
+        "transfer_open": (10, "Transferable", None),
+    },
+})
+
+# Transfer-restriction keywords, matched against the lower-cased field
+_TR_PROHIBITED = re.compile(r"prohibited")
+_TR_TRANSFERABLE = re.compile(r"assignment|participation")
+
+# Static buyer-specific notes appended to each diligence summary
+_DILIGENCE_FOOTERS = {
+    "CLO": (
+        "\n### CLO-Specific Notes\n"
+        "- Verify eligibility for CLO portfolio\n"
+        "- Check rating agency requirements\n"
+        "- Confirm transfer mechanics with Agent\n"
+    ),
+    "Bank": (
+        "\n### Bank-Specific Notes\n"
+        "- Verify regulatory capital treatment\n"
+        "- Check internal credit policies\n"
+        "- Confirm documentation standards\n"
+    ),
+    "DistressedFund": (
+        "\n### Distressed Fund-Specific Notes\n"
+        "- Assess restructuring potential\n"
+        "- Review default provisions\n"
+        "- Evaluate workout scenarios\n"
+    ),
+}
+
+
+def _mentions_any(value: Any, keywords: Tuple[str, ...]) -> bool:
+    """Check string keys/values of nested terms for keywords without stringifying the whole structure"""
+    if isinstance(value, str):
+        value_lower = value.lower()
+        return any(keyword in value_lower for keyword in keywords)
+    if isinstance(value, dict):
+        return any(
+            _mentions_any(key, keywords) or _mentions_any(item, keywords)
+            for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return any(_mentions_any(item, keywords) for item in value)
+    return False
+
+
+def _score_buyer_type(
+    features: Dict[str, Any], rules: Dict[str, Any], compliance_has_fail: bool
+) -> Tuple[int, List[str], List[str]]:
+    """Apply one buyer type's rules to the shared features"""
+    score = 50 + rules.get("base_bonus", 0)  # Base score
+    indicators = []
+    reasoning_parts = []
+    
+    def apply(rule):
+        nonlocal score
+        delta, indicator, reasoning = rule
+        score += delta
+        indicators.append(indicator)
+        if reasoning:
+            reasoning_parts.append(reasoning)
+    
+    covenant_count = features["covenant_count"]
+    for tier in rules.get("covenant_tiers", ()):
+        if covenant_count >= tier[0]:
+            apply(tier[1:])
+            break
+    
+    if features["has_default"] and "default_provisions" in rules:
+        apply(rules["default_provisions"])
+    
+    if features["transfer_prohibited"]:
+        if "transfer_prohibited" in rules:
+            apply(rules["transfer_prohibited"])
+    else:
+        if features["transfer_has_assign"] and "transfer_assign" in rules:
+            apply(rules["transfer_assign"])
+        if "transfer_open" in rules:
+            apply(rules["transfer_open"])
+    
+    if not compliance_has_fail and "compliance_clean" in rules:
+        apply(rules["compliance_clean"])
+    
+    # Common factors
+    # Interest rate attractiveness - higher rates more attractive
+    rate_value = features["rate_value"]
+    if rate_value is not None and rate_value >= 5.0:
+        score += 5
+        indicators.append("Attractive interest rate")
+    
+    return score, indicators, reasoning_parts
 
 
 class BuyerFitAnalyzer:
     def __init__(self):
-        self.buyer_profiles = self._load_buyer_profiles()
+        self.buyer_profiles = _BUYER_PROFILES
 
-    async def analyze_buyer_fit(
+    def analyze_buyer_fit(
         self, analysis_id: str, extracted_terms: Dict, compliance_checks: List[Dict]
     ) -> Dict[str, Any]:
         """
@@ -30,9 +181,13 @@ class BuyerFitAnalyzer:
         """
         buyer_fits = []
         
-        for buyer_type in ["CLO", "Bank", "DistressedFund"]:
-            fit_analysis = await self._analyze_buyer_type(
-                buyer_type, extracted_terms, compliance_checks
+        # Parse the shared inputs once for all buyer types
+        features = self._extract_features(extracted_terms)
+        has_fail = any(check.get("status") == "fail" for check in compliance_checks)
+        
+        for buyer_type in _RULES:
+            fit_analysis = self._analyze_buyer_type(
+                buyer_type, extracted_terms, features, compliance_has_fail=has_fail
             )
             buyer_fits.append({
                 "buyer_type": buyer_type,
@@ -47,104 +202,40 @@ class BuyerFitAnalyzer:
             "analysis_id": analysis_id,
         }
 
-    async def _analyze_buyer_type(
-        self, buyer_type: str, extracted_terms: Dict, compliance_checks: List[Dict]
-    ) -> Dict[str, Any]:
-        """Analyze fit for a specific buyer type"""
-        profile = self.buyer_profiles.get(buyer_type, {})
-        score = 50  # Base score
-        indicators = []
-        reasoning_parts = []
+    def _extract_features(self, extracted_terms: Dict) -> Dict[str, Any]:
+        """Extract the fields used by buyer-type scoring once per analysis"""
+        covenants = extracted_terms.get("financial_covenants", [])
+        transfer_restrictions = str(extracted_terms.get("transfer_restrictions", "")).lower()
         
-        # CLO-specific analysis
-        if buyer_type == "CLO":
-            # CLOs prefer covenant-lite or moderate covenants
-            covenants = extracted_terms.get("financial_covenants", [])
-            covenant_count = len(covenants) if isinstance(covenants, list) else 0
-            
-            if covenant_count <= 3:
-                score += 20
-                indicators.append("Covenant-lite structure")
-                reasoning_parts.append("Low covenant count aligns with CLO preferences")
-            elif covenant_count <= 5:
-                score += 10
-                indicators.append("Moderate covenants")
-            else:
-                score -= 15
-                indicators.append("High covenant count - may be restrictive for CLOs")
-                reasoning_parts.append("High number of covenants may limit CLO flexibility")
-            
-            # CLOs prefer transferable loans
-            transfer_restrictions = str(extracted_terms.get("transfer_restrictions", "")).lower()
-            if "prohibited" in transfer_restrictions:
-                score -= 30
-                indicators.append("Transfer prohibited - major blocker")
-                reasoning_parts.append("Transfer prohibition is a critical issue for CLOs")
-            elif "assignment" in transfer_restrictions or "participation" in transfer_restrictions:
-                score += 15
-                indicators.append("Transfer provisions present")
-                reasoning_parts.append("Transfer provisions allow CLO flexibility")
-            
-            # CLOs prefer standard LMA terms
-            if not any(check.get("status") == "fail" for check in compliance_checks):
-                score += 10
-                indicators.append("Standard LMA compliance")
-        
-        # Bank-specific analysis
-        elif buyer_type == "Bank":
-            # Banks prefer strong covenants
-            covenants = extracted_terms.get("financial_covenants", [])
-            covenant_count = len(covenants) if isinstance(covenants, list) else 0
-            
-            if covenant_count >= 3:
-                score += 20
-                indicators.append("Strong covenant package")
-                reasoning_parts.append("Covenants provide bank with monitoring tools")
-            elif covenant_count > 0:
-                score += 10
-                indicators.append("Some covenants present")
-            else:
-                score -= 10
-                indicators.append("Covenant-lite - may be less attractive to banks")
-                reasoning_parts.append("Banks typically prefer covenant protection")
-            
-            # Banks are more flexible on transfer restrictions
-            transfer_restrictions = str(extracted_terms.get("transfer_restrictions", "")).lower()
-            if "prohibited" not in transfer_restrictions:
-                score += 10
-                indicators.append("Transferable structure")
-        
-        # Distressed Fund-specific analysis
-        elif buyer_type == "DistressedFund":
-            # Distressed funds are more flexible on terms
-            score += 15  # Base advantage - more flexible
-            
-            # Check for default/restructuring provisions
-            document_text = str(extracted_terms).lower()
-            if "default" in document_text or "restructuring" in document_text:
-                score += 15
-                indicators.append("Default/restructuring provisions present")
-                reasoning_parts.append("Distressed funds specialize in these situations")
-            
-            # Transfer restrictions less critical
-            transfer_restrictions = str(extracted_terms.get("transfer_restrictions", "")).lower()
-            if "prohibited" not in transfer_restrictions:
-                score += 10
-                indicators.append("Transferable")
-        
-        # Common factors
-        # Interest rate attractiveness
+        # Interest rate attractiveness (simplified heuristic)
+        rate_value = None
         interest_rate = extracted_terms.get("interest_rate", "")
         if interest_rate:
-            # Higher rates more attractive (simplified heuristic)
             try:
                 rate_value = float(str(interest_rate).replace("%", "").strip())
-                if rate_value >= 5.0:
-                    score += 5
-                    indicators.append("Attractive interest rate")
-            except:
+            except ValueError:
                 pass
         
+        return {
+            "covenant_count": len(covenants) if isinstance(covenants, list) else 0,
+            "transfer_prohibited": _TR_PROHIBITED.search(transfer_restrictions) is not None,
+            "transfer_has_assign": _TR_TRANSFERABLE.search(transfer_restrictions) is not None,
+            "rate_value": rate_value,
+            "has_default": _mentions_any(extracted_terms, ("default", "restructuring")),
+        }
+
+    def _analyze_buyer_type(
+        self,
+        buyer_type: str,
+        extracted_terms: Dict,
+        features: Dict[str, Any],
+        compliance_has_fail: bool = False,
+    ) -> Dict[str, Any]:
+        """Analyze fit for a specific buyer type"""
+        score, indicators, reasoning_parts = _score_buyer_type(
+            features, _RULES.get(buyer_type, {}), compliance_has_fail
+        )
+        
         # Maturity
         maturity = extracted_terms.get("maturity_date", "")
         if maturity:
@@ -174,66 +265,33 @@ class BuyerFitAnalyzer:
         self, buyer_type: str, extracted_terms: Dict, indicators: List[str]
     ) -> str:
         """Generate buyer-specific diligence summary"""
-        summary = f"""
+        parts = [f"""
 # {buyer_type} Buyer Diligence Summary
 
 ## Key Considerations for {buyer_type} Buyers
 
 ### Transfer Provisions
-"""
+"""]
         
         transfer_restrictions = extracted_terms.get("transfer_restrictions", "")
         if transfer_restrictions:
-            summary += f"- Transfer restrictions: {transfer_restrictions}\n"
+            parts.append(f"- Transfer restrictions: {transfer_restrictions}\n")
         else:
-            summary += "- Transfer provisions: Standard\n"
+            parts.append("- Transfer provisions: Standard\n")
         
-        summary += "\n### Covenants\n"
+        parts.append("\n### Covenants\n")
         covenants = extracted_terms.get("financial_covenants", [])
         if isinstance(covenants, list) and covenants:
-            summary += f"- {len(covenants)} financial covenants identified\n"
+            parts.append(f"- {len(covenants)} financial covenants identified\n")
             for covenant in covenants[:3]:  # Show first 3
                 if isinstance(covenant, dict):
-                    summary += f"  - {covenant.get('name', 'Covenant')}: {covenant.get('requirement', 'N/A')}\n"
+                    parts.append(f"  - {covenant.get('name', 'Covenant')}: {covenant.get('requirement', 'N/A')}\n")
         else:
-            summary += "- Covenant structure: Verify with Agent\n"
-        
-        summary += "\n### Key Indicators\n"
-        for indicator in indicators:
-            summary += f"- {indicator}\n"
-        
-        if buyer_type == "CLO":
-            summary += "\n### CLO-Specific Notes\n"
-            summary += "- Verify eligibility for CLO portfolio\n"
-            summary += "- Check rating agency requirements\n"
-            summary += "- Confirm transfer mechanics with Agent\n"
-        elif buyer_type == "Bank":
-            summary += "\n### Bank-Specific Notes\n"
-            summary += "- Verify regulatory capital treatment\n"
-            summary += "- Check internal credit policies\n"
-            summary += "- Confirm documentation standards\n"
-        elif buyer_type == "DistressedFund":
-            summary += "\n### Distressed Fund-Specific Notes\n"
-            summary += "- Assess restructuring potential\n"
-            summary += "- Review default provisions\n"
-            summary += "- Evaluate workout scenarios\n"
-        
-        return summary.strip()
-
-    def _load_buyer_profiles(self) -> Dict[str, Dict]:
-        """Load buyer type profiles"""
-        return {
-            "CLO": {
-                "preferences": ["covenant_lite", "transferable", "standard_terms"],
-                "avoid": ["high_covenants", "transfer_prohibited"],
-            },
-            "Bank": {
-                "preferences": ["strong_covenants", "standard_terms", "regulatory_compliant"],
-                "avoid": ["covenant_lite", "non_standard"],
-            },
-            "DistressedFund": {
-                "preferences": ["flexible_terms", "default_provisions"],
-                "avoid": [],
-            },
-        }
-
+            parts.append("- Covenant structure: Verify with Agent\n")
+        
+        parts.append("\n### Key Indicators\n")
+        parts.extend(f"- {indicator}\n" for indicator in indicators)
+        
+        parts.append(_DILIGENCE_FOOTERS.get(buyer_type, ""))
+        
+        return "".join(parts).strip()
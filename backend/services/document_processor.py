@@ -6,7 +6,176 @@ import openpyxl
 from typing import Dict, Optional
 import pytesseract
 from PIL import Image
+import asyncio
 import io
+import re
+import threading
+import zipfile
+from functools import lru_cache
+from lxml import etree
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    # Optional fast path; pdfplumber is used when pdfium is unavailable
+    pdfium = None
+
+# pdfium is not thread-safe; every call into it must hold this lock
+_PDFIUM_LOCK = threading.Lock()
+
+
+# Filename keywords per document type, in priority order
+_DOCUMENT_TYPE_KEYWORDS = (
+    ("credit_agreement", ("credit", "agreement")),
+    ("amendment", ("amendment",)),
+    ("financial_statement", ("financial", "statement")),
+    ("covenant_compliance", ("covenant",)),
+)
+
+# Lookahead so overlapping keyword matches are all reported
+_DOCUMENT_KEYWORD_RE = re.compile(
+    "(?=(%s))" % "|".join(
+        re.escape(keyword) for _, keywords in _DOCUMENT_TYPE_KEYWORDS for keyword in keywords
+    )
+)
+
+
+@lru_cache(maxsize=4096)
+def _classify_by_name(name_lower: str) -> str:
+    """Classify a lower-cased filename; cached for batch reprocessing"""
+    # One scan for all keywords, then pick the highest-priority document type
+    found = {match.group(1) for match in _DOCUMENT_KEYWORD_RE.finditer(name_lower)}
+    for doc_type, keywords in _DOCUMENT_TYPE_KEYWORDS:
+        if not found.isdisjoint(keywords):
+            return doc_type
+    return "other"
+
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W_P = f"{{{_W_NS}}}p"
+_W_R = f"{{{_W_NS}}}r"
+_W_HYPERLINK = f"{{{_W_NS}}}hyperlink"
+_W_T = f"{{{_W_NS}}}t"
+_W_BR = f"{{{_W_NS}}}br"
+_W_BR_TYPE = f"{{{_W_NS}}}type"
+
+# Text equivalents of run children, as python-docx's Run.text; w:t and w:br are handled separately
+_W_RUN_TEXT = {
+    f"{{{_W_NS}}}tab": "\t",
+    f"{{{_W_NS}}}ptab": "\t",
+    f"{{{_W_NS}}}cr": "\n",
+    f"{{{_W_NS}}}noBreakHyphen": "-",
+}
+
+# Uploaded documents are untrusted: never resolve entities or fetch external resources
+_DOCX_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=False)
+
+
+def _docx_run_text(run) -> str:
+    """Text of one w:r from its direct children, matching python-docx's Run.text"""
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == _W_T:
+            parts.append(child.text or "")
+        elif tag == _W_BR:
+            # Only line breaks are text; page and column breaks are dropped
+            if child.get(_W_BR_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            parts.append(_W_RUN_TEXT.get(tag, ""))
+    return "".join(parts)
+
+
+def _extract_docx_text_xml(file_path: str) -> str:
+    """Extract body paragraph text straight from word/document.xml (same output as python-docx)"""
+    with zipfile.ZipFile(file_path) as docx_zip:
+        root = etree.fromstring(docx_zip.read("word/document.xml"), _DOCX_XML_PARSER)
+    paragraphs = []
+    for paragraph in root.iterfind(f"{{{_W_NS}}}body/{_W_P}"):
+        # Only the paragraph's own runs (direct or inside a hyperlink), as doc.paragraphs reads them;
+        # nested text boxes, their mc:Fallback copies and tracked insertions are not paragraph text
+        parts = []
+        for child in paragraph:
+            if child.tag == _W_R:
+                parts.append(_docx_run_text(child))
+            elif child.tag == _W_HYPERLINK:
+                parts.extend(_docx_run_text(run) for run in child.iterchildren(_W_R))
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def _extract_pdf_text_pdfium(file_path: str) -> str:
+    """Extract plain text from all pages of a PDF with pdfium"""
+    parts = []
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            for page in pdf:
+                text_page = page.get_textpage()
+                page_text = text_page.get_text_range()
+                text_page.close()
+                page.close()
+                if page_text:
+                    parts.append(page_text.replace("\r\n", "\n"))
+                    parts.append("\n")
+        finally:
+            pdf.close()
+    return "".join(parts)
+
+
+def _extract_pdf_text_pdfplumber(file_path: str) -> str:
+    """Extract text from all pages of a PDF with pdfplumber in a single pass"""
+    parts = []
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text()
+            if page_text:
+                parts.append(page_text)
+                parts.append("\n")
+    return "".join(parts)
+
+
+def _extract_pdf_text_pypdf2(file_path: str) -> str:
+    """Extract text from all pages of a PDF with PyPDF2"""
+    parts = []
+    with open(file_path, "rb") as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page in pdf_reader.pages:
+            parts.append(page.extract_text())
+            parts.append("\n")
+    return "".join(parts)
+
+
+def _extract_docx_text(file_path: str) -> str:
+    """Extract text from a Word document"""
+    try:
+        return _extract_docx_text_xml(file_path)
+    except Exception:
+        # Fallback to python-docx
+        doc = DocxDocument(file_path)
+        return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+
+
+def _extract_xlsx_text(file_path: str) -> str:
+    """Extract text from an Excel workbook"""
+    # Read-only mode streams rows instead of loading the whole workbook model
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    text_parts = []
+    
+    try:
+        for sheet_name in workbook.sheetnames:
+            sheet = workbook[sheet_name]
+            text_parts.append(f"Sheet: {sheet_name}\n")
+            for row in sheet.iter_rows(values_only=True):
+                row_text = " | ".join("" if cell is None else str(cell) for cell in row)
+                text_parts.append(row_text)
+            text_parts.append("\n")
+    finally:
+        # Read-only workbooks keep the file handle open until closed
+        workbook.close()
+    
+    return "\n".join(text_parts)
 
 
 class DocumentProcessor:
@@ -19,7 +188,7 @@ class DocumentProcessor:
             ".xlsx": self._process_xlsx,
         }
 
-    async def process_document(self, file_path: str, filename: str) -> Dict:
+    def process_document(self, file_path: str, filename: str) -> Dict:
         """Process document and return metadata"""
         file_ext = os.path.splitext(filename)[1].lower()
         
@@ -27,7 +196,7 @@ class DocumentProcessor:
             raise ValueError(f"Unsupported file type: {file_ext}")
         
         processor = self.supported_types[file_ext]
-        doc_type = await self._classify_document(file_path, file_ext)
+        doc_type = self._classify_document(file_path, file_ext)
         
         return {
             "type": doc_type,
@@ -35,78 +204,57 @@ class DocumentProcessor:
             "processed": True,
         }
 
-    async def extract_text(self, file_path: str) -> str:
-        """Extract text from document"""
+    async def extract_text(self, file_path: str, layout_aware: bool = False) -> str:
+        """Extract text from document
+        
+        layout_aware: for PDFs, use pdfplumber's slower layout analysis instead of pdfium
+        """
         file_ext = os.path.splitext(file_path)[1].lower()
         
         if file_ext not in self.supported_types:
             raise ValueError(f"Unsupported file type: {file_ext}")
         
+        if file_ext == ".pdf":
+            return await self._process_pdf(file_path, layout_aware=layout_aware)
+        
         processor = self.supported_types[file_ext]
         return await processor(file_path)
 
-    async def _process_pdf(self, file_path: str) -> str:
+    async def _process_pdf(self, file_path: str, layout_aware: bool = False) -> str:
         """Extract text from PDF"""
-        text = ""
+        if pdfium is not None and not layout_aware:
+            # pdfium is much faster than pdfplumber for plain text extraction
+            try:
+                return await asyncio.to_thread(_extract_pdf_text_pdfium, file_path)
+            except Exception:
+                # Fall back to pdfplumber / PyPDF2 / OCR below
+                pass
+        
         try:
             # Try pdfplumber first (better for structured content)
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            return await asyncio.to_thread(_extract_pdf_text_pdfplumber, file_path)
         except Exception:
             # Fallback to PyPDF2
             try:
-                with open(file_path, "rb") as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
+                return await asyncio.to_thread(_extract_pdf_text_pypdf2, file_path)
             except Exception:
                 # Try OCR if text extraction fails
-                text = await self._ocr_pdf(file_path)
-        
-        return text
+                return await self._ocr_pdf(file_path)
 
     async def _process_docx(self, file_path: str) -> str:
         """Extract text from Word document"""
-        doc = DocxDocument(file_path)
-        return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+        return await asyncio.to_thread(_extract_docx_text, file_path)
 
     async def _process_xlsx(self, file_path: str) -> str:
         """Extract text from Excel file"""
-        workbook = openpyxl.load_workbook(file_path)
-        text_parts = []
-        
-        for sheet_name in workbook.sheetnames:
-            sheet = workbook[sheet_name]
-            text_parts.append(f"Sheet: {sheet_name}\n")
-            for row in sheet.iter_rows(values_only=True):
-                row_text = " | ".join([str(cell) if cell else "" for cell in row])
-                text_parts.append(row_text)
-            text_parts.append("\n")
-        
-        return "\n".join(text_parts)
+        return await asyncio.to_thread(_extract_xlsx_text, file_path)
 
     async def _ocr_pdf(self, file_path: str) -> str:
         """OCR for PDF using pytesseract"""
         # This is a placeholder - would need proper PDF to image conversion
         return "OCR text extraction not fully implemented"
 
-    async def _classify_document(self, file_path: str, file_ext: str) -> str:
+    def _classify_document(self, file_path: str, file_ext: str) -> str:
         """Classify document type based on content"""
         # Simple classification based on filename and content
-        filename_lower = os.path.basename(file_path).lower()
-        
-        if "credit" in filename_lower or "agreement" in filename_lower:
-            return "credit_agreement"
-        elif "amendment" in filename_lower:
-            return "amendment"
-        elif "financial" in filename_lower or "statement" in filename_lower:
-            return "financial_statement"
-        elif "covenant" in filename_lower:
-            return "covenant_compliance"
-        else:
-            return "other"
-
-
+        return _classify_by_name(os.path.basename(file_path).lower())
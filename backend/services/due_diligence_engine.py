@@ -1,64 +1,193 @@
+from types import MappingProxyType
 from typing import Dict, List
 import re
 
+try:
+    import hyperscan
+except ImportError:
+    # Optional fast path; the re patterns below are used when hyperscan is unavailable
+    hyperscan = None
+
+
+# Document-text patterns used by the due diligence checks
+_CONSENT_RE = re.compile(r"consent.*required|prior.*written.*consent", re.IGNORECASE)
+_COVENANT_RE = re.compile(
+    r"covenant|financial.*ratio|debt.*to.*equity|interest.*coverage", re.IGNORECASE
+)
+_PAYMENT_RE = re.compile(
+    r"payment.*due|interest.*payment|principal.*payment|default", re.IGNORECASE
+)
+_LIEN_RE = re.compile(r"lien|encumbrance|security.*interest|pledge", re.IGNORECASE)
+
+# Keyword sets matched against the lower-cased document in a single pass each
+_RESTRICTION_KEYWORDS = (
+    "prohibited",
+    "restricted",
+    "requires consent",
+    "prior written consent",
+    "assignment restrictions",
+)
+_REGULATORY_KEYWORDS = (
+    "kyc",
+    "aml",
+    "know your customer",
+    "anti-money laundering",
+    "regulatory",
+    "compliance",
+)
+_RESTRICTION_KEYWORD_RE = re.compile("|".join(map(re.escape, _RESTRICTION_KEYWORDS)))
+_REGULATORY_KEYWORD_RE = re.compile("|".join(map(re.escape, _REGULATORY_KEYWORDS)))
+
+# Feature name -> pattern; a feature's bit in the hyperscan match mask is its index
+_FEATURE_PATTERNS = (
+    ("has_restrictions", _RESTRICTION_KEYWORD_RE),
+    ("has_consent", _CONSENT_RE),
+    ("has_covenant_mention", _COVENANT_RE),
+    ("has_payment_terms", _PAYMENT_RE),
+    ("has_lien", _LIEN_RE),
+    ("has_regulatory", _REGULATORY_KEYWORD_RE),
+)
+
+
+def _build_feature_database():
+    """Compile all feature patterns into one caseless hyperscan database"""
+    if hyperscan is None:
+        return None
+    try:
+        database = hyperscan.Database()
+        database.compile(
+            expressions=[pattern.pattern.encode() for _, pattern in _FEATURE_PATTERNS],
+            ids=list(range(len(_FEATURE_PATTERNS))),
+            elements=len(_FEATURE_PATTERNS),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(_FEATURE_PATTERNS),
+        )
+        return database
+    except Exception as e:
+        print(f"Hyperscan unavailable, using re patterns: {e}")
+        return None
+
+
+_FEATURE_DATABASE = _build_feature_database()
+
+
+def _scan_feature_mask(document_text: str) -> int:
+    """Scan the document once with hyperscan, returning a bitmask of matched features"""
+    mask = 0
+    
+    def on_match(pattern_id, start, end, flags, context):
+        nonlocal mask
+        mask |= 1 << pattern_id
+    
+    _FEATURE_DATABASE.scan(document_text.encode("utf-8", "replace"), match_event_handler=on_match)
+    return mask
+
+
+# Compliance rule flags (placeholder for more complex rule engine)
+_COMPLIANCE_RULES = MappingProxyType({
+    "lma_standards": True,
+    "regulatory_requirements": True,
+})
+
+# Risk points per AI risk-flag severity
+_SEVERITY_SCORES = {"high": 30, "medium": 15, "low": 5}
+
+# Risk-flag category -> index into [credit, legal, operational] totals
+_RISK_BUCKETS = {"credit": 0, "legal": 1, "operational": 2}
+
+# (condition on risk assessment and its breakdown, recommendation), in output order
+_RECS_RULES = (
+    (
+        lambda risk, breakdown: risk["overall_score"] >= 70,
+        "High risk detected. Recommend thorough review by legal and credit teams before proceeding.",
+    ),
+    (
+        lambda risk, breakdown: breakdown["credit_risk"] >= 60,
+        "Elevated credit risk identified. Consider additional credit analysis and borrower financial review.",
+    ),
+    (
+        lambda risk, breakdown: breakdown["legal_risk"] >= 60,
+        "Significant legal risks present. Recommend legal counsel review of identified clauses and restrictions.",
+    ),
+)
+
 
 class DueDiligenceEngine:
     def __init__(self):
-        self.compliance_rules = self._load_compliance_rules()
+        self.compliance_rules = _COMPLIANCE_RULES
 
     async def run_checks(self, document_text: str, ai_results: Dict) -> List[Dict]:
         """Run all due diligence checks"""
-        checks = []
-        
-        # Transfer restrictions check
-        checks.append(await self._check_transfer_restrictions(document_text, ai_results))
-        
-        # Consent requirements check
-        checks.append(await self._check_consent_requirements(document_text, ai_results))
+        scan = self._scan_document(document_text)
         
-        # Financial covenants check
-        checks.append(await self._check_financial_covenants(document_text, ai_results))
-        
-        # Payment history check (would need actual payment data)
-        checks.append(await self._check_payment_obligations(document_text))
-        
-        # Lien verification (would need external data)
-        checks.append(await self._check_lien_mentions(document_text))
-        
-        # Regulatory compliance
-        checks.append(await self._check_regulatory_compliance(document_text))
+        return [
+            # Transfer restrictions check
+            self._check_transfer_restrictions(scan, ai_results),
+            # Consent requirements check
+            self._check_consent_requirements(scan, ai_results),
+            # Financial covenants check
+            self._check_financial_covenants(scan, ai_results),
+            # Payment history check (would need actual payment data)
+            self._check_payment_obligations(scan),
+            # Lien verification (would need external data)
+            self._check_lien_mentions(scan),
+            # Regulatory compliance
+            self._check_regulatory_compliance(scan),
+        ]
+
+    def _scan_document(self, document_text: str) -> Dict[str, bool]:
+        """Compute every document-text feature used by the checks in one pass"""
+        if _FEATURE_DATABASE is not None:
+            mask = _scan_feature_mask(document_text)
+            return {
+                name: bool(mask & (1 << bit))
+                for bit, (name, _) in enumerate(_FEATURE_PATTERNS)
+            }
         
-        return checks
+        doc_lower = document_text.lower()
+        return {
+            "has_restrictions": bool(_RESTRICTION_KEYWORD_RE.search(doc_lower)),
+            "has_consent": bool(_CONSENT_RE.search(document_text)),
+            "has_covenant_mention": bool(_COVENANT_RE.search(document_text)),
+            "has_payment_terms": bool(_PAYMENT_RE.search(document_text)),
+            "has_lien": bool(_LIEN_RE.search(document_text)),
+            "has_regulatory": bool(_REGULATORY_KEYWORD_RE.search(doc_lower)),
+        }
 
-    async def calculate_risk_score(
+    def calculate_risk_score(
         self, ai_results: Dict, compliance_results: List[Dict]
     ) -> Dict:
         """Calculate overall risk score"""
-        credit_risk = 0
-        legal_risk = 0
-        operational_risk = 0
+        # Nothing to score: skip the loops below
+        if (
+            not ai_results.get("risk_flags")
+            and not compliance_results
+            and not ai_results.get("unusual_clauses")
+        ):
+            return {
+                "overall_score": 0,
+                "breakdown": {
+                    "credit_risk": 0,
+                    "legal_risk": 0,
+                    "operational_risk": 0,
+                },
+            }
         
-        # Analyze risk flags from AI
+        # Analyze risk flags from AI; unknown categories count as operational
+        totals = [0, 0, 0]
         risk_flags = ai_results.get("risk_flags", [])
         for flag in risk_flags:
-            severity_score = {"high": 30, "medium": 15, "low": 5}.get(
-                flag.get("severity", "low"), 0
-            )
+            severity = flag.get("severity", "low")
             category = flag.get("category", "operational")
-            
-            if category == "credit":
-                credit_risk += severity_score
-            elif category == "legal":
-                legal_risk += severity_score
-            else:
-                operational_risk += severity_score
+            totals[_RISK_BUCKETS.get(category, 2)] += _SEVERITY_SCORES.get(severity, 0)
+        credit_risk, legal_risk, operational_risk = totals
         
         # Analyze compliance failures
         for check in compliance_results:
             if check["status"] == "fail":
-                if "transfer" in check["category"].lower():
+                category = check["category"].lower()
+                if "transfer" in category:
                     legal_risk += 20
-                elif "covenant" in check["category"].lower():
+                elif "covenant" in category:
                     credit_risk += 15
                 else:
                     operational_risk += 10
@@ -88,36 +217,22 @@ class DueDiligenceEngine:
             },
         }
 
-    async def generate_recommendations(
+    def generate_recommendations(
         self, risk_assessment: Dict, compliance_results: List[Dict]
     ) -> List[str]:
         """Generate actionable recommendations"""
-        recommendations = []
-        
-        overall_score = risk_assessment["overall_score"]
         breakdown = risk_assessment["breakdown"]
-        
-        if overall_score >= 70:
-            recommendations.append(
-                "High risk detected. Recommend thorough review by legal and credit teams before proceeding."
-            )
-        
-        if breakdown["credit_risk"] >= 60:
-            recommendations.append(
-                "Elevated credit risk identified. Consider additional credit analysis and borrower financial review."
-            )
-        
-        if breakdown["legal_risk"] >= 60:
-            recommendations.append(
-                "Significant legal risks present. Recommend legal counsel review of identified clauses and restrictions."
-            )
+        recommendations = [
+            message for condition, message in _RECS_RULES
+            if condition(risk_assessment, breakdown)
+        ]
         
         # Compliance-specific recommendations
-        for check in compliance_results:
-            if check["status"] == "fail":
-                recommendations.append(
-                    f"Compliance issue in {check['category']}: {check['description']}"
-                )
+        recommendations.extend(
+            f"Compliance issue in {check['category']}: {check['description']}"
+            for check in compliance_results
+            if check["status"] == "fail"
+        )
         
         if not recommendations:
             recommendations.append(
@@ -126,25 +241,15 @@ class DueDiligenceEngine:
         
         return recommendations
 
-    async def _check_transfer_restrictions(
-        self, document_text: str, ai_results: Dict
+    def _check_transfer_restrictions(
+        self, scan: Dict[str, bool], ai_results: Dict
     ) -> Dict:
         """Check for transfer restrictions"""
         terms = ai_results.get("extracted_terms", {})
         transfer_info = terms.get("transfer_restrictions", "")
         
         # Look for common restriction keywords
-        restriction_keywords = [
-            "prohibited",
-            "restricted",
-            "requires consent",
-            "prior written consent",
-            "assignment restrictions",
-        ]
-        
-        has_restrictions = any(
-            keyword.lower() in document_text.lower() for keyword in restriction_keywords
-        ) or bool(transfer_info)
+        has_restrictions = scan["has_restrictions"] or bool(transfer_info)
         
         return {
             "category": "Transfer Restrictions",
@@ -153,20 +258,14 @@ class DueDiligenceEngine:
             "details": transfer_info if transfer_info else "Standard transfer provisions",
         }
 
-    async def _check_consent_requirements(
-        self, document_text: str, ai_results: Dict
+    def _check_consent_requirements(
+        self, scan: Dict[str, bool], ai_results: Dict
     ) -> Dict:
         """Check consent requirements for transfer"""
         terms = ai_results.get("extracted_terms", {})
         consent_reqs = terms.get("consent_requirements", [])
         
-        has_consent_reqs = len(consent_reqs) > 0 or bool(
-            re.search(
-                r"consent.*required|prior.*written.*consent",
-                document_text,
-                re.IGNORECASE,
-            )
-        )
+        has_consent_reqs = len(consent_reqs) > 0 or scan["has_consent"]
         
         return {
             "category": "Consent Requirements",
@@ -175,20 +274,14 @@ class DueDiligenceEngine:
             "details": ", ".join(consent_reqs) if consent_reqs else "Standard provisions",
         }
 
-    async def _check_financial_covenants(
-        self, document_text: str, ai_results: Dict
+    def _check_financial_covenants(
+        self, scan: Dict[str, bool], ai_results: Dict
     ) -> Dict:
         """Check financial covenants"""
         terms = ai_results.get("extracted_terms", {})
         covenants = terms.get("financial_covenants", [])
         
-        has_covenants = len(covenants) > 0 or bool(
-            re.search(
-                r"covenant|financial.*ratio|debt.*to.*equity|interest.*coverage",
-                document_text,
-                re.IGNORECASE,
-            )
-        )
+        has_covenants = len(covenants) > 0 or scan["has_covenant_mention"]
         
         return {
             "category": "Financial Covenants",
@@ -197,16 +290,10 @@ class DueDiligenceEngine:
             "details": "Covenants require ongoing monitoring" if has_covenants else "Verify covenant requirements",
         }
 
-    async def _check_payment_obligations(self, document_text: str) -> Dict:
+    def _check_payment_obligations(self, scan: Dict[str, bool]) -> Dict:
         """Check payment obligations"""
         # This would typically require access to payment history data
-        has_payment_terms = bool(
-            re.search(
-                r"payment.*due|interest.*payment|principal.*payment|default",
-                document_text,
-                re.IGNORECASE,
-            )
-        )
+        has_payment_terms = scan["has_payment_terms"]
         
         return {
             "category": "Payment Obligations",
@@ -215,15 +302,9 @@ class DueDiligenceEngine:
             "details": "Verify payment history with borrower records",
         }
 
-    async def _check_lien_mentions(self, document_text: str) -> Dict:
+    def _check_lien_mentions(self, scan: Dict[str, bool]) -> Dict:
         """Check for lien mentions"""
-        has_lien_mentions = bool(
-            re.search(
-                r"lien|encumbrance|security.*interest|pledge",
-                document_text,
-                re.IGNORECASE,
-            )
-        )
+        has_lien_mentions = scan["has_lien"]
         
         return {
             "category": "Lien Verification",
@@ -232,20 +313,9 @@ class DueDiligenceEngine:
             "details": "Requires external verification of lien registry",
         }
 
-    async def _check_regulatory_compliance(self, document_text: str) -> Dict:
+    def _check_regulatory_compliance(self, scan: Dict[str, bool]) -> Dict:
         """Check for regulatory compliance mentions"""
-        regulatory_keywords = [
-            "kyc",
-            "aml",
-            "know your customer",
-            "anti-money laundering",
-            "regulatory",
-            "compliance",
-        ]
-        
-        has_regulatory = any(
-            keyword.lower() in document_text.lower() for keyword in regulatory_keywords
-        )
+        has_regulatory = scan["has_regulatory"]
         
         return {
             "category": "Regulatory Compliance",
@@ -253,12 +323,3 @@ class DueDiligenceEngine:
             "description": "Regulatory compliance provisions identified" if has_regulatory else "Limited regulatory compliance mentions",
             "details": "Verify KYC/AML requirements are met",
         }
-
-    def _load_compliance_rules(self) -> Dict:
-        """Load compliance rules (placeholder for more complex rule engine)"""
-        return {
-            "lma_standards": True,
-            "regulatory_requirements": True,
-        }
-
-
@@ -2,16 +2,63 @@
 Evidence Log System
 Unified system for tracking citations and evidence across all features
 """
-from typing import Dict, List, Any, Optional
-from datetime import datetime
-import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple, Union
+from datetime import datetime, timezone
+from secrets import token_hex as _token_hex
+import time
+
+
+# Last (epoch, ISO string) pair handed out by _utc_now_iso
+_LAST_TS = [0.0, ""]
+
+
+def _utc_now_iso() -> str:
+    """Current UTC time as a naive ISO string, reformatted at most once per second"""
+    t = time.time()
+    if t - _LAST_TS[0] > 1.0:
+        _LAST_TS[1] = datetime.fromtimestamp(t, tz=timezone.utc).replace(tzinfo=None).isoformat()
+        _LAST_TS[0] = t
+    return _LAST_TS[1]
+
+
+@dataclass(slots=True, frozen=True)
+class EvidenceRecord:
+    """A single piece of logged evidence with its citation"""
+    id: str
+    analysis_id: str
+    document_id: str
+    document_name: str
+    page_number: Optional[int]
+    section: Optional[str]
+    extraction_text: str
+    extraction_confidence: float
+    feature_type: str
+    feature_id: str
+    created_at: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict form for JSON serialization"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# Evidence as returned by log_evidence, or its to_dict() / stored JSON form
+Evidence = Union[EvidenceRecord, Dict[str, Any]]
+
+
+def _feature_key(evidence: Evidence) -> Tuple[Any, Any]:
+    """(feature_type, feature_id) of a record or a plain evidence dict"""
+    if isinstance(evidence, EvidenceRecord):
+        return evidence.feature_type, evidence.feature_id
+    return evidence.get("feature_type"), evidence.get("feature_id")
 
 
 class EvidenceLogService:
     def __init__(self):
         pass
 
-    async def log_evidence(
+    def log_evidence(
         self,
         analysis_id: str,
         document_id: str,
@@ -22,36 +69,45 @@ class EvidenceLogService:
         feature_id: str,
         page_number: Optional[int] = None,
         section: Optional[str] = None,
-    ) -> Dict[str, Any]:
+        created_at: Optional[str] = None,
+    ) -> EvidenceRecord:
         """Log evidence with citation"""
-        evidence_id = str(uuid.uuid4())
+        evidence_id = _token_hex(16)
+        if created_at is None:
+            created_at = _utc_now_iso()
         
-        return {
-            "id": evidence_id,
-            "analysis_id": analysis_id,
-            "document_id": document_id,
-            "document_name": document_name,
-            "page_number": page_number,
-            "section": section,
-            "extraction_text": extraction_text,
-            "extraction_confidence": extraction_confidence,
-            "feature_type": feature_type,
-            "feature_id": feature_id,
-            "created_at": datetime.utcnow().isoformat(),
-        }
-
-    async def get_evidence_for_feature(
-        self, feature_type: str, feature_id: str, evidence_logs: List[Dict]
-    ) -> List[Dict]:
-        """Get evidence for a specific feature"""
-        return [
-            log
-            for log in evidence_logs
-            if log.get("feature_type") == feature_type and log.get("feature_id") == feature_id
-        ]
-
-    def format_citation(self, evidence: Dict) -> str:
+        return EvidenceRecord(
+            id=evidence_id,
+            analysis_id=analysis_id,
+            document_id=document_id,
+            document_name=document_name,
+            page_number=page_number,
+            section=section,
+            extraction_text=extraction_text,
+            extraction_confidence=extraction_confidence,
+            feature_type=feature_type,
+            feature_id=feature_id,
+            created_at=created_at,
+        )
+
+    def get_evidence_for_feature(
+        self, feature_type: str, feature_id: str, evidence_logs: List[Evidence]
+    ) -> List[Evidence]:
+        """Get evidence for a specific feature (use build_index for many lookups)"""
+        key = (feature_type, feature_id)
+        return [log for log in evidence_logs if _feature_key(log) == key]
+
+    def build_index(self, evidence_logs: List[Evidence]) -> Dict[Tuple[str, str], List[Evidence]]:
+        """Index evidence by (feature_type, feature_id) for repeated feature lookups"""
+        index = defaultdict(list)
+        for log in evidence_logs:
+            index[_feature_key(log)].append(log)
+        return dict(index)
+
+    def format_citation(self, evidence: Evidence) -> str:
         """Format evidence as citation string"""
+        if isinstance(evidence, EvidenceRecord):
+            evidence = evidence.to_dict()
         parts = []
         
         if evidence.get("document_name"):
@@ -71,12 +127,14 @@ class EvidenceLogService:
 
     async def create_evidence_links(
         self, analysis_id: str, document_id: str, document_name: str, evidence_data: List[Dict]
-    ) -> List[Dict]:
+    ) -> List[EvidenceRecord]:
         """Create evidence links from evidence data"""
         evidence_links = []
+        # All links in one batch share a creation timestamp
+        created_at = _utc_now_iso()
         
         for evidence in evidence_data:
-            link = await self.log_evidence(
+            link = self.log_evidence(
                 analysis_id=analysis_id,
                 document_id=document_id,
                 document_name=document_name,
@@ -86,6 +144,7 @@ class EvidenceLogService:
                 feature_id=evidence.get("feature_id", ""),
                 page_number=evidence.get("page_number"),
                 section=evidence.get("section"),
+                created_at=created_at,
             )
             evidence_links.append(link)
         
@@ -2,13 +2,61 @@
 LMA Deviation Engine
 Compares extracted clauses against LMA baseline templates
 """
+from collections import namedtuple
+from types import MappingProxyType
 from typing import Dict, List, Any
 import re
 
 
+# LMA baseline templates (static, shared by all engine instances)
+_BASELINE_TEMPLATES = MappingProxyType({
+    "transfer": """
+Standard LMA Transfer Provision:
+- Assignments: Permitted with Agent consent (not to be unreasonably withheld)
+- Participations: Permitted without consent
+- Minimum transfer amount: Typically $1M or higher
+- Restrictions: No transfers to competitors or restricted parties
+""",
+    "covenant": """
+Standard LMA Financial Covenants:
+- Debt-to-EBITDA ratio
+- Interest Coverage Ratio
+- Leverage ratio
+- Typically tested quarterly
+""",
+    "payment": """
+Standard LMA Payment Provisions:
+- Interest payments: Quarterly or semi-annual
+- Principal: Bullet at maturity or amortizing schedule
+- Default: Payment default after grace period
+""",
+    "consent": """
+Standard LMA Consent Requirements:
+- Agent consent for assignments (not to be unreasonably withheld)
+- Borrower consent typically not required for assignments
+- Majority lender consent for material amendments
+""",
+})
+
+# Any of these in the lower-cased document counts as a payment-terms mention
+_PAYMENT_KEYWORDS = ("payment", "interest", "principal", "default")
+_PAYMENT_KEYWORD_RE = re.compile("|".join(map(re.escape, _PAYMENT_KEYWORDS)))
+
+# Text checks that need more than one literal use patterns compiled once here;
+# single-literal checks stay as plain `in` tests
+_TRANSFERABLE_RE = re.compile(r"assignment|participation")
+
+# A single clause deviation from the LMA baseline
+Deviation = namedtuple(
+    "Deviation",
+    "id analysis_id document_id clause_type clause_text deviation_severity "
+    "market_impact baseline_template confidence page_reference section_reference",
+)
+
+
 class LMADeviationEngine:
     def __init__(self):
-        self.baseline_templates = self._load_baseline_templates()
+        self.baseline_templates = _BASELINE_TEMPLATES
 
     async def analyze_deviations(
         self, analysis_id: str, document_id: str, extracted_terms: Dict, document_text: str
@@ -44,27 +92,20 @@ class LMADeviationEngine:
         )
         deviations.extend(payment_deviations)
         
-        # Calculate severity breakdown
-        severity_breakdown = {
-            "high": len([d for d in deviations if d.get("deviation_severity") == "high"]),
-            "medium": len([d for d in deviations if d.get("deviation_severity") == "medium"]),
-            "low": len([d for d in deviations if d.get("deviation_severity") == "low"]),
-        }
-        
-        # Generate heatmap by clause type
+        # Calculate severity breakdown and heatmap by clause type in one pass
+        severity_breakdown = {"high": 0, "medium": 0, "low": 0}
         heatmap = {}
         for deviation in deviations:
-            clause_type = deviation.get("clause_type", "other")
-            if clause_type not in heatmap:
-                heatmap[clause_type] = {
-                    "count": 0,
-                    "high_severity": 0,
-                    "medium_severity": 0,
-                    "low_severity": 0,
-                }
-            heatmap[clause_type]["count"] += 1
-            severity = deviation.get("deviation_severity", "low")
-            heatmap[clause_type][f"{severity}_severity"] += 1
+            severity = deviation.deviation_severity
+            severity_breakdown[severity] = severity_breakdown.get(severity, 0) + 1
+            entry = heatmap.setdefault(deviation.clause_type, {
+                "count": 0,
+                "high_severity": 0,
+                "medium_severity": 0,
+                "low_severity": 0,
+            })
+            entry["count"] += 1
+            entry[f"{severity}_severity"] += 1
         
         return {
             "deviations": deviations,
@@ -75,7 +116,7 @@ class LMADeviationEngine:
 
     def _analyze_transfer_clauses(
         self, analysis_id: str, document_id: str, extracted_terms: Dict, document_text: str
-    ) -> List[Dict]:
+    ) -> List[Deviation]:
         """Analyze transfer-related clauses"""
         deviations = []
         
@@ -84,39 +125,39 @@ class LMADeviationEngine:
         
         # Check for non-standard restrictions
         if "prohibited" in transfer_restrictions:
-            deviations.append({
-                "id": f"{analysis_id}_transfer_1",
-                "analysis_id": analysis_id,
-                "document_id": document_id,
-                "clause_type": "transfer",
-                "clause_text": extracted_terms.get("transfer_restrictions", ""),
-                "deviation_severity": "high",
-                "market_impact": "Significantly reduces liquidity - transfers may be prohibited entirely",
-                "baseline_template": baseline_transfer,
-                "confidence": 0.9,
-                "page_reference": "N/A",
-                "section_reference": "Transfer Provisions",
-            })
-        elif "assignment" not in transfer_restrictions and "participation" not in transfer_restrictions:
-            deviations.append({
-                "id": f"{analysis_id}_transfer_2",
-                "analysis_id": analysis_id,
-                "document_id": document_id,
-                "clause_type": "transfer",
-                "clause_text": extracted_terms.get("transfer_restrictions", ""),
-                "deviation_severity": "medium",
-                "market_impact": "Unclear transfer provisions may delay closing or require legal clarification",
-                "baseline_template": baseline_transfer,
-                "confidence": 0.7,
-                "page_reference": "N/A",
-                "section_reference": "Transfer Provisions",
-            })
+            deviations.append(Deviation(
+                id=f"{analysis_id}_transfer_1",
+                analysis_id=analysis_id,
+                document_id=document_id,
+                clause_type="transfer",
+                clause_text=extracted_terms.get("transfer_restrictions", ""),
+                deviation_severity="high",
+                market_impact="Significantly reduces liquidity - transfers may be prohibited entirely",
+                baseline_template=baseline_transfer,
+                confidence=0.9,
+                page_reference="N/A",
+                section_reference="Transfer Provisions",
+            ))
+        elif not _TRANSFERABLE_RE.search(transfer_restrictions):
+            deviations.append(Deviation(
+                id=f"{analysis_id}_transfer_2",
+                analysis_id=analysis_id,
+                document_id=document_id,
+                clause_type="transfer",
+                clause_text=extracted_terms.get("transfer_restrictions", ""),
+                deviation_severity="medium",
+                market_impact="Unclear transfer provisions may delay closing or require legal clarification",
+                baseline_template=baseline_transfer,
+                confidence=0.7,
+                page_reference="N/A",
+                section_reference="Transfer Provisions",
+            ))
         
         return deviations
 
     def _analyze_covenant_clauses(
         self, analysis_id: str, document_id: str, extracted_terms: Dict, document_text: str
-    ) -> List[Dict]:
+    ) -> List[Deviation]:
         """Analyze covenant-related clauses"""
         deviations = []
         
@@ -128,91 +169,58 @@ class LMADeviationEngine:
         
         # Check for unusual covenant structures
         if len(covenants) == 0:
-            deviations.append({
-                "id": f"{analysis_id}_covenant_1",
-                "analysis_id": analysis_id,
-                "document_id": document_id,
-                "clause_type": "covenant",
-                "clause_text": "No financial covenants identified",
-                "deviation_severity": "medium",
-                "market_impact": "Lack of covenants may indicate covenant-lite structure - verify with Agent",
-                "baseline_template": baseline_covenant,
-                "confidence": 0.6,
-                "page_reference": "N/A",
-                "section_reference": "Covenants",
-            })
+            deviations.append(Deviation(
+                id=f"{analysis_id}_covenant_1",
+                analysis_id=analysis_id,
+                document_id=document_id,
+                clause_type="covenant",
+                clause_text="No financial covenants identified",
+                deviation_severity="medium",
+                market_impact="Lack of covenants may indicate covenant-lite structure - verify with Agent",
+                baseline_template=baseline_covenant,
+                confidence=0.6,
+                page_reference="N/A",
+                section_reference="Covenants",
+            ))
         elif len(covenants) > 5:
-            deviations.append({
-                "id": f"{analysis_id}_covenant_2",
-                "analysis_id": analysis_id,
-                "document_id": document_id,
-                "clause_type": "covenant",
-                "clause_text": f"{len(covenants)} financial covenants identified",
-                "deviation_severity": "low",
-                "market_impact": "High number of covenants may indicate tighter structure - monitor closely",
-                "baseline_template": baseline_covenant,
-                "confidence": 0.7,
-                "page_reference": "N/A",
-                "section_reference": "Covenants",
-            })
+            deviations.append(Deviation(
+                id=f"{analysis_id}_covenant_2",
+                analysis_id=analysis_id,
+                document_id=document_id,
+                clause_type="covenant",
+                clause_text=f"{len(covenants)} financial covenants identified",
+                deviation_severity="low",
+                market_impact="High number of covenants may indicate tighter structure - monitor closely",
+                baseline_template=baseline_covenant,
+                confidence=0.7,
+                page_reference="N/A",
+                section_reference="Covenants",
+            ))
         
         return deviations
 
     def _analyze_payment_clauses(
         self, analysis_id: str, document_id: str, extracted_terms: Dict, document_text: str
-    ) -> List[Dict]:
+    ) -> List[Deviation]:
         """Analyze payment-related clauses"""
         deviations = []
         
-        # Check for unusual payment terms
-        payment_keywords = ["payment", "interest", "principal", "default"]
-        payment_mentions = sum(1 for keyword in payment_keywords if keyword in document_text.lower())
-        
-        if payment_mentions == 0:
-            deviations.append({
-                "id": f"{analysis_id}_payment_1",
-                "analysis_id": analysis_id,
-                "document_id": document_id,
-                "clause_type": "payment",
-                "clause_text": "Payment terms not clearly identified",
-                "deviation_severity": "medium",
-                "market_impact": "Unclear payment terms may require clarification with Agent",
-                "baseline_template": self.baseline_templates.get("payment", ""),
-                "confidence": 0.6,
-                "page_reference": "N/A",
-                "section_reference": "Payment Provisions",
-            })
+        # Check for unusual payment terms (one pass over the lower-cased text)
+        has_payment_mentions = _PAYMENT_KEYWORD_RE.search(document_text.lower()) is not None
+        
+        if not has_payment_mentions:
+            deviations.append(Deviation(
+                id=f"{analysis_id}_payment_1",
+                analysis_id=analysis_id,
+                document_id=document_id,
+                clause_type="payment",
+                clause_text="Payment terms not clearly identified",
+                deviation_severity="medium",
+                market_impact="Unclear payment terms may require clarification with Agent",
+                baseline_template=self.baseline_templates.get("payment", ""),
+                confidence=0.6,
+                page_reference="N/A",
+                section_reference="Payment Provisions",
+            ))
         
         return deviations
-
-    def _load_baseline_templates(self) -> Dict[str, str]:
-        """Load LMA baseline templates"""
-        return {
-            "transfer": """
-Standard LMA Transfer Provision:
-- Assignments: Permitted with Agent consent (not to be unreasonably withheld)
-- Participations: Permitted without consent
-- Minimum transfer amount: Typically $1M or higher
-- Restrictions: No transfers to competitors or restricted parties
-""",
-            "covenant": """
-Standard LMA Financial Covenants:
-- Debt-to-EBITDA ratio
-- Interest Coverage Ratio
-- Leverage ratio
-- Typically tested quarterly
-""",
-            "payment": """
-Standard LMA Payment Provisions:
-- Interest payments: Quarterly or semi-annual
-- Principal: Bullet at maturity or amortizing schedule
-- Default: Payment default after grace period
-""",
-            "consent": """
-Standard LMA Consent Requirements:
-- Agent consent for assignments (not to be unreasonably withheld)
-- Borrower consent typically not required for assignments
-- Majority lender consent for material amendments
-""",
-        }
-
@@ -3,8 +3,24 @@ Mock data generator for testing and demo purposes
 """
 from models import Analysis
 from datetime import datetime, timedelta
+from typing import List, Optional
 import random
 
+import numpy as np
+
+
+_LOW_RISK_RECOMMENDATIONS = (
+    "Standard due diligence procedures recommended",
+    "Verify payment history with borrower records",
+    "Confirm lien status with registry",
+)
+
+_HIGH_RISK_RECOMMENDATIONS = (
+    "High risk detected. Recommend thorough review by legal and credit teams.",
+    "Elevated credit risk identified. Consider additional credit analysis.",
+    "Significant legal risks present. Recommend legal counsel review.",
+)
+
 
 def create_mock_analysis(loan_name: str = "Sample Loan Agreement") -> dict:
     """Create mock analysis data for testing"""
@@ -77,17 +93,113 @@ def create_mock_analysis(loan_name: str = "Sample Loan Agreement") -> dict:
                 },
             ],
         },
-        "recommendations": [
-            "Standard due diligence procedures recommended",
-            "Verify payment history with borrower records",
-            "Confirm lien status with registry",
-        ] if risk_score < 50 else [
-            "High risk detected. Recommend thorough review by legal and credit teams.",
-            "Elevated credit risk identified. Consider additional credit analysis.",
-            "Significant legal risks present. Recommend legal counsel review.",
-        ],
+        "recommendations": list(
+            _LOW_RISK_RECOMMENDATIONS if risk_score < 50 else _HIGH_RISK_RECOMMENDATIONS
+        ),
         "created_at": (datetime.now() - timedelta(days=random.randint(0, 30))).isoformat(),
         "updated_at": datetime.now().isoformat(),
     }
 
 
+def create_mock_analyses(
+    n: int, loan_name: str = "Sample Loan Agreement", seed: Optional[int] = None
+) -> List[dict]:
+    """Create n mock analyses, drawing each random field for the whole batch at once
+    
+    seed: makes the batch reproducible (the module-level random seed does not apply here)
+    """
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    
+    ids = rng.integers(1000, 10000, size=n).tolist()
+    risk_scores = rng.integers(20, 86, size=n).tolist()
+    risk_breakdowns = rng.integers(10, 81, size=(n, 3)).tolist()
+    transfer_statuses = rng.choice(["pass", "warning", "fail"], size=n).tolist()
+    consent_statuses = rng.choice(["pass", "warning"], size=n).tolist()
+    lien_statuses = rng.choice(["pass", "warning"], size=n).tolist()
+    interest_rates = rng.uniform(2.5, 8.5, size=n).tolist()
+    maturity_days = rng.integers(365, 1826, size=n).tolist()
+    principal_amounts = rng.integers(1, 101, size=n).tolist()
+    debt_to_equity = rng.uniform(1.5, 2.8, size=n).tolist()
+    interest_coverage = rng.uniform(2.6, 4.0, size=n).tolist()
+    created_days_ago = rng.integers(0, 31, size=n).tolist()
+    
+    analyses = []
+    for i in range(n):
+        risk_score = risk_scores[i]
+        credit_risk, legal_risk, operational_risk = risk_breakdowns[i]
+        analyses.append({
+            "id": f"analysis_{ids[i]}",
+            "loan_name": loan_name,
+            "status": "completed",
+            "risk_score": risk_score,
+            "risk_breakdown": {
+                "credit_risk": credit_risk,
+                "legal_risk": legal_risk,
+                "operational_risk": operational_risk,
+            },
+            "compliance_checks": [
+                {
+                    "category": "Transfer Restrictions",
+                    "status": transfer_statuses[i],
+                    "description": "Standard transfer provisions identified",
+                    "details": "No significant restrictions found",
+                },
+                {
+                    "category": "Consent Requirements",
+                    "status": consent_statuses[i],
+                    "description": "Consent required from lender",
+                    "details": "Standard consent provisions",
+                },
+                {
+                    "category": "Financial Covenants",
+                    "status": "pass",
+                    "description": "3 financial covenants identified",
+                    "details": "Debt-to-equity ratio, interest coverage, minimum liquidity",
+                },
+                {
+                    "category": "Payment Obligations",
+                    "status": "pass",
+                    "description": "Payment terms identified",
+                    "details": "Monthly interest payments, quarterly principal",
+                },
+                {
+                    "category": "Lien Verification",
+                    "status": lien_statuses[i],
+                    "description": "No explicit lien mentions",
+                    "details": "Requires external verification",
+                },
+                {
+                    "category": "Regulatory Compliance",
+                    "status": "pass",
+                    "description": "KYC/AML provisions identified",
+                    "details": "Standard compliance requirements",
+                },
+            ],
+            "extracted_terms": {
+                "interest_rate": f"{interest_rates[i]:.2f}%",
+                "maturity_date": (now + timedelta(days=maturity_days[i])).strftime("%Y-%m-%d"),
+                "principal_amount": f"${principal_amounts[i]}M",
+                "transfer_restrictions": "Standard assignment provisions apply",
+                "consent_requirements": ["Lender", "Administrative Agent"],
+                "financial_covenants": [
+                    {
+                        "name": "Debt-to-Equity Ratio",
+                        "requirement": "Not to exceed 3.0:1.0",
+                        "current_value": f"{debt_to_equity[i]:.2f}:1.0",
+                    },
+                    {
+                        "name": "Interest Coverage Ratio",
+                        "requirement": "Not less than 2.5:1.0",
+                        "current_value": f"{interest_coverage[i]:.2f}:1.0",
+                    },
+                ],
+            },
+            "recommendations": list(
+                _LOW_RISK_RECOMMENDATIONS if risk_score < 50 else _HIGH_RISK_RECOMMENDATIONS
+            ),
+            "created_at": (now - timedelta(days=created_days_ago[i])).isoformat(),
+            "updated_at": now.isoformat(),
+        })
+    
+    return analyses
@@ -2,8 +2,31 @@
 Post-Trade Monitoring Service
 Monitors covenants and key dates/obligations with alerts
 """
-from typing import Dict, List, Any
-from datetime import datetime, timedelta
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List
+from datetime import datetime, timedelta, timezone
+import asyncio
+import re
+import uuid
+
+import numpy as np
+
+
+# First number in a covenant requirement, e.g. "3.0" in "Not to exceed 3.0:1.0"
+_COVENANT_NUM_RE = re.compile(r"(\d+(?:\.\d+)?)")
+
+# Thousands separators, spaces and currency symbols dropped before parsing a covenant value
+_STRIP_TBL = str.maketrans("", "", ", $€£")
+
+# Rule sets at least this large are evaluated in a worker thread (NumPy releases the GIL)
+_OFFLOAD_RULE_COUNT = 10_000
+
+
+def _evaluate_thresholds(threshold: np.ndarray, current: np.ndarray, alert_threshold: np.ndarray):
+    """Return (breach_pct, fire_mask, critical_mask) for arrays of rule values"""
+    # Rules without a positive threshold count as breached
+    breach_pct = np.divide(current, threshold, out=np.ones_like(current), where=threshold > 0)
+    return breach_pct, breach_pct >= alert_threshold, breach_pct >= 1.0
 
 
 class MonitoringService:
@@ -14,8 +37,9 @@ class MonitoringService:
         self, analysis_id: str, rule_config: Dict
     ) -> Dict[str, Any]:
         """Create a monitoring rule"""
+        # Random suffix: fixed width and unique even for rules created in the same microsecond
         return {
-            "id": f"rule_{analysis_id}_{datetime.utcnow().timestamp()}",
+            "id": f"rule_{analysis_id}_{uuid.uuid4().hex[:12]}",
             "analysis_id": analysis_id,
             "rule_type": rule_config.get("rule_type", "covenant"),
             "rule_name": rule_config.get("rule_name", "Unnamed Rule"),
@@ -29,41 +53,85 @@ class MonitoringService:
     async def check_rules(self, rules: List[Dict]) -> List[Dict]:
         """Check all monitoring rules and generate alerts"""
         alerts = []
+        # Rules with a NULL threshold or current value can't be evaluated, so they never alert
+        active = [
+            rule
+            for rule in rules
+            if rule.get("is_active", True)
+            and rule.get("threshold_value", 0.0) is not None
+            and rule.get("current_value", 0.0) is not None
+        ]
+        if not active:
+            return alerts
         
-        for rule in rules:
-            if not rule.get("is_active", True):
-                continue
-            
-            threshold = rule.get("threshold_value", 0.0)
-            current = rule.get("current_value", 0.0)
-            alert_threshold_pct = rule.get("alert_threshold", 0.9)
-            
-            # Calculate breach percentage
-            if threshold > 0:
-                breach_pct = current / threshold
-            else:
-                breach_pct = 1.0
+        # Read each rule's numeric fields in a single pass into an (n, 3) array
+        n = len(active)
+        values = np.fromiter(
+            (
+                value
+                for rule in active
+                for value in (
+                    rule.get("threshold_value", 0.0),
+                    rule.get("current_value", 0.0),
+                    rule.get("alert_threshold", 0.9),
+                )
+            ),
+            dtype=np.float64,
+            count=3 * n,
+        ).reshape(n, 3)
+        threshold, current, alert_threshold_pct = values.T
+        
+        # Calculate breach percentages and alert masks
+        if n >= _OFFLOAD_RULE_COUNT:
+            breach_pct, fire, critical = await asyncio.to_thread(
+                _evaluate_thresholds, threshold, current, alert_threshold_pct
+            )
+        else:
+            breach_pct, fire, critical = _evaluate_thresholds(threshold, current, alert_threshold_pct)
+        
+        # All alerts from one check share a timestamp (naive UTC, as stored elsewhere)
+        now_iso = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+        
+        # Generate alerts only for rules approaching their threshold
+        for i in np.flatnonzero(fire).tolist():
+            rule = active[i]
+            rule_breach_pct = float(breach_pct[i])
+            alert_type = "critical" if critical[i] else "warning"
             
-            # Generate alert if approaching threshold
-            if breach_pct >= alert_threshold_pct:
-                alert_type = "critical" if breach_pct >= 1.0 else "warning"
-                
-                alerts.append({
-                    "rule_id": rule.get("id"),
-                    "analysis_id": rule.get("analysis_id"),
-                    "alert_type": alert_type,
-                    "message": self._generate_alert_message(rule, breach_pct),
-                    "threshold_breach_percentage": breach_pct,
-                    "is_acknowledged": False,
-                    "created_at": datetime.utcnow().isoformat(),
-                })
+            alerts.append({
+                "rule_id": rule.get("id"),
+                "analysis_id": rule.get("analysis_id"),
+                "alert_type": alert_type,
+                "message": self._generate_alert_message(rule, rule_breach_pct),
+                "threshold_breach_percentage": rule_breach_pct,
+                "is_acknowledged": False,
+                "created_at": now_iso,
+            })
         
         return alerts
 
+    async def check_rules_batched(self, rules: List[Dict]) -> Dict[str, Any]:
+        """Check rules and group the alerts by analysis and alert type"""
+        alerts = await self.check_rules(rules)
+        batches = defaultdict(lambda: {"critical": [], "warning": []})
+        for alert in alerts:
+            batches[alert["analysis_id"]][alert["alert_type"]].append(alert)
+        return {"batches": dict(batches)}
+
+    async def flush_batches(
+        self,
+        batches: Dict[str, Dict[str, List[Dict]]],
+        sink: Callable[[str, str, List[Dict]], Awaitable[Any]],
+    ) -> None:
+        """Send each non-empty (analysis, alert type) group to sink in one call"""
+        for analysis_id, by_type in batches.items():
+            for alert_type, alerts in by_type.items():
+                if alerts:
+                    await sink(analysis_id, alert_type, alerts)
+
     def _generate_alert_message(self, rule: Dict, breach_pct: float) -> str:
         """Generate alert message"""
         rule_name = rule.get("rule_name", "Rule")
-        rule_type = rule.get("rule_type", "covenant")
         current = rule.get("current_value", 0.0)
         threshold = rule.get("threshold_value", 0.0)
         
@@ -85,7 +153,8 @@ class MonitoringService:
             for covenant in covenants:
                 if isinstance(covenant, dict):
                     rule = {
-                        "id": f"rule_{analysis_id}_covenant_{covenant.get('name', 'unknown')}",
+                        # Covenant names can repeat within one agreement, so they don't identify the rule
+                        "id": f"rule_{analysis_id}_covenant_{uuid.uuid4().hex[:12]}",
                         "analysis_id": analysis_id,
                         "rule_type": "covenant",
                         "rule_name": covenant.get("name", "Financial Covenant"),
@@ -116,20 +185,18 @@ class MonitoringService:
     def _parse_covenant_threshold(self, requirement: str) -> float:
         """Parse covenant threshold from requirement text"""
         # Simplified parsing - would need more sophisticated NLP
-        try:
-            # Look for numbers
-            import re
-            numbers = re.findall(r'\d+\.?\d*', str(requirement))
-            if numbers:
-                return float(numbers[0])
-        except:
-            pass
+        match = _COVENANT_NUM_RE.search(str(requirement))
+        if match:
+            try:
+                return float(match.group(1))
+            except ValueError:
+                pass
         return 0.0
 
     def _parse_covenant_value(self, current_value: str) -> float:
         """Parse current covenant value"""
         try:
-            return float(str(current_value).replace(",", "").strip())
+            return float(str(current_value).translate(_STRIP_TBL).strip())
         except:
             return 0.0
 
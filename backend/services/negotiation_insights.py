@@ -3,11 +3,80 @@ Negotiation Insights Generator
 Identifies clauses likely to be negotiated and suggests redlines/questions
 """
 from typing import Dict, List, Any
+import re
+
+
+# Transfer-restriction keywords; match.lastgroup names the keyword found
+_TRANSFER_RE = re.compile(
+    r"(?P<prohibited>prohibited)|(?P<restricted>restricted)|(?P<consent>consent)",
+    re.IGNORECASE,
+)
 
 
 class NegotiationInsightsGenerator:
+    # Static parts of each insight; analyzers add the clause text per call
+    _TRANSFER_PROHIBITED_TPL = {
+        "clause_reference": "Transfer Provisions",
+        "negotiation_likelihood": "high",
+        "suggested_redlines": (
+            "Remove transfer prohibition",
+            "Add standard LMA transfer provisions allowing assignments with Agent consent",
+            "Clarify participation rights",
+        ),
+        "questions_for_agent": (
+            "Are there any exceptions to the transfer prohibition?",
+            "Can we negotiate assignment rights?",
+            "What is the process for requesting transfer consent?",
+        ),
+        "risk_basis": "Transfer prohibition significantly limits liquidity and marketability",
+    }
+    _TRANSFER_RESTRICTED_TPL = {
+        "clause_reference": "Transfer Provisions",
+        "negotiation_likelihood": "medium",
+        "suggested_redlines": (
+            "Clarify transfer restrictions",
+            "Specify consent requirements and thresholds",
+        ),
+        "questions_for_agent": (
+            "What are the specific transfer restrictions?",
+            "What consent is required for assignments?",
+        ),
+        "risk_basis": "Unclear transfer restrictions may delay closing",
+    }
+    _CONSENT_TPL = {
+        "clause_reference": "Consent Requirements",
+        "negotiation_likelihood": "medium",
+        "suggested_redlines": (
+            "Limit consent requirements to Agent only for standard assignments",
+            "Clarify consent thresholds and timing",
+        ),
+        "questions_for_agent": (
+            "Can we reduce consent requirements for standard transfers?",
+            "What is the typical consent timeline?",
+            "Are there any consent exceptions?",
+        ),
+        "risk_basis": "Multiple consent requirements can delay transfers and increase complexity",
+    }
+    _COVENANTS_TPL = {
+        "clause_reference": "Financial Covenants",
+        "negotiation_likelihood": "low",
+        "suggested_redlines": (
+            "Review covenant headroom and thresholds",
+            "Consider covenant relief provisions",
+        ),
+        "questions_for_agent": (
+            "What is the current covenant headroom?",
+            "Are there any covenant relief provisions?",
+            "What is the covenant testing frequency?",
+        ),
+        "risk_basis": "High number of covenants may indicate tight structure - verify headroom",
+    }
+
     def __init__(self):
         self.negotiation_triggers = self._load_negotiation_triggers()
+        # One case-insensitive pattern per likelihood level, searched once per clause
+        self._high_re = self._compile_triggers(self.negotiation_triggers["high_likelihood"])
+        self._med_re = self._compile_triggers(self.negotiation_triggers["medium_likelihood"])
 
     async def generate_insights(
         self, analysis_id: str, extracted_terms: Dict, compliance_checks: List[Dict]
@@ -70,39 +139,18 @@ class NegotiationInsightsGenerator:
         self, analysis_id: str, extracted_terms: Dict
     ) -> Dict[str, Any] | None:
         """Analyze transfer provisions for negotiation"""
-        transfer_restrictions = str(extracted_terms.get("transfer_restrictions", "")).lower()
+        transfer_restrictions = str(extracted_terms.get("transfer_restrictions", ""))
+        flags = {match.lastgroup for match in _TRANSFER_RE.finditer(transfer_restrictions)}
         
-        if "prohibited" in transfer_restrictions:
+        if "prohibited" in flags:
             return {
-                "clause_reference": "Transfer Provisions",
+                **self._TRANSFER_PROHIBITED_TPL,
                 "clause_text": extracted_terms.get("transfer_restrictions", ""),
-                "negotiation_likelihood": "high",
-                "suggested_redlines": [
-                    "Remove transfer prohibition",
-                    "Add standard LMA transfer provisions allowing assignments with Agent consent",
-                    "Clarify participation rights",
-                ],
-                "questions_for_agent": [
-                    "Are there any exceptions to the transfer prohibition?",
-                    "Can we negotiate assignment rights?",
-                    "What is the process for requesting transfer consent?",
-                ],
-                "risk_basis": "Transfer prohibition significantly limits liquidity and marketability",
             }
-        elif "restricted" in transfer_restrictions and "consent" not in transfer_restrictions:
+        elif "restricted" in flags and "consent" not in flags:
             return {
-                "clause_reference": "Transfer Provisions",
+                **self._TRANSFER_RESTRICTED_TPL,
                 "clause_text": extracted_terms.get("transfer_restrictions", ""),
-                "negotiation_likelihood": "medium",
-                "suggested_redlines": [
-                    "Clarify transfer restrictions",
-                    "Specify consent requirements and thresholds",
-                ],
-                "questions_for_agent": [
-                    "What are the specific transfer restrictions?",
-                    "What consent is required for assignments?",
-                ],
-                "risk_basis": "Unclear transfer restrictions may delay closing",
             }
         
         return None
@@ -116,20 +164,13 @@ class NegotiationInsightsGenerator:
             consent_reqs = [consent_reqs] if consent_reqs else []
         
         if len(consent_reqs) > 2:
+            clause_text = str(consent_reqs)
             return {
-                "clause_reference": "Consent Requirements",
-                "clause_text": str(consent_reqs),
-                "negotiation_likelihood": "medium",
-                "suggested_redlines": [
-                    "Limit consent requirements to Agent only for standard assignments",
-                    "Clarify consent thresholds and timing",
-                ],
-                "questions_for_agent": [
-                    "Can we reduce consent requirements for standard transfers?",
-                    "What is the typical consent timeline?",
-                    "Are there any consent exceptions?",
-                ],
-                "risk_basis": "Multiple consent requirements can delay transfers and increase complexity",
+                **self._CONSENT_TPL,
+                "clause_text": clause_text,
+                "negotiation_likelihood": self._trigger_likelihood(
+                    clause_text, self._CONSENT_TPL["negotiation_likelihood"]
+                ),
             }
         
         return None
@@ -138,28 +179,15 @@ class NegotiationInsightsGenerator:
         self, analysis_id: str, extracted_terms: Dict
     ) -> Dict[str, Any] | None:
         """Analyze covenants for negotiation"""
-        covenants = extracted_terms.get("financial_covenants", [])
-        if not isinstance(covenants, list):
+        covenants = extracted_terms.get("financial_covenants")
+        # Common case: few or no covenants, nothing to negotiate
+        if not covenants or not isinstance(covenants, list) or len(covenants) <= 5:
             return None
         
-        if len(covenants) > 5:
-            return {
-                "clause_reference": "Financial Covenants",
-                "clause_text": f"{len(covenants)} financial covenants",
-                "negotiation_likelihood": "low",
-                "suggested_redlines": [
-                    "Review covenant headroom and thresholds",
-                    "Consider covenant relief provisions",
-                ],
-                "questions_for_agent": [
-                    "What is the current covenant headroom?",
-                    "Are there any covenant relief provisions?",
-                    "What is the covenant testing frequency?",
-                ],
-                "risk_basis": "High number of covenants may indicate tight structure - verify headroom",
-            }
-        
-        return None
+        return {
+            **self._COVENANTS_TPL,
+            "clause_text": f"{len(covenants)} financial covenants",
+        }
 
     def _analyze_compliance_for_negotiation(
         self, analysis_id: str, compliance_check: Dict
@@ -186,6 +214,18 @@ class NegotiationInsightsGenerator:
         
         return None
 
+    def _trigger_likelihood(self, clause_text: str, default: str) -> str:
+        """Likelihood from the negotiation triggers in clause_text; never lower than default"""
+        if self._high_re.search(clause_text):
+            return "high"
+        if default == "low" and self._med_re.search(clause_text):
+            return "medium"
+        return default
+
+    def _compile_triggers(self, keywords: List[str]) -> re.Pattern:
+        """Compile trigger keywords into a single alternation"""
+        return re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+
     def _load_negotiation_triggers(self) -> Dict[str, List[str]]:
         """Load negotiation trigger keywords"""
         return {
@@ -1,11 +1,10 @@
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from typing import Dict
+import asyncio
+import hashlib
+import io
 import os
+import tempfile
+import threading
 from datetime import datetime
 
 
@@ -13,26 +12,105 @@ class ReportGenerator:
     def __init__(self):
         self.reports_dir = "reports"
         os.makedirs(self.reports_dir, exist_ok=True)
+        
+        # reportlab is imported on first render, not at startup; most requests never build a report
+        self._styles = None
+        self._styles_lock = threading.Lock()
 
     async def generate_report(self, analysis, report_type: str = "executive") -> str:
         """Generate PDF report"""
-        filename = f"{analysis.id}_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        # Content-addressed name: the same analysis version renders to the same file
+        fingerprint = f"{analysis.id}|{report_type}|{analysis.updated_at}"
+        key = hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+        filename = f"{analysis.id}_{report_type}_{key}.pdf"
         filepath = os.path.join(self.reports_dir, filename)
         
-        doc = SimpleDocTemplate(filepath, pagesize=letter)
+        if os.path.exists(filepath):
+            return filepath
+        
+        # ReportLab rendering is blocking CPU work; keep it off the event loop
+        return await asyncio.to_thread(self._build_pdf, filepath, analysis)
+
+    def _load_styles(self):
+        """Import reportlab and build the shared report styles on first use"""
+        with self._styles_lock:
+            if self._styles is not None:
+                return
+            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+            from reportlab.platypus import TableStyle
+            from reportlab.lib import colors
+            from reportlab.lib.enums import TA_CENTER
+            
+            # Styles are static config; build them once and share across reports
+            styles = getSampleStyleSheet()
+            self._title_style = ParagraphStyle(
+                "CustomTitle",
+                parent=styles["Heading1"],
+                fontSize=24,
+                textColor=colors.HexColor("#0ea5e9"),
+                spaceAfter=30,
+                alignment=TA_CENTER,
+            )
+            self._risk_score_styles = {
+                name: ParagraphStyle(
+                    "RiskScore",
+                    parent=styles["Normal"],
+                    textColor=risk_color,
+                    fontSize=16,
+                )
+                for name, risk_color in (
+                    ("red", colors.red),
+                    ("orange", colors.orange),
+                    ("green", colors.green),
+                )
+            }
+            self._footer_style = ParagraphStyle(
+                "Footer",
+                parent=styles["Normal"],
+                fontSize=8,
+                textColor=colors.grey,
+                alignment=TA_CENTER,
+            )
+            self._risk_table_style = TableStyle(
+                [
+                    ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                    ("FONTSIZE", (0, 0), (-1, 0), 12),
+                    ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+                    ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
+                ]
+            )
+            self._compliance_table_commands = [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTNAME", (1, 1), (1, -1), "Helvetica-Bold"),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+            ]
+            self._styles = styles
+
+    def _build_pdf(self, filepath: str, analysis) -> str:
+        """Build the PDF report at filepath"""
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+        from reportlab.lib import colors
+        
+        if self._styles is None:
+            self._load_styles()
+        
+        # Render in memory so a failed build never leaves a truncated PDF at filepath
+        buf = io.BytesIO()
+        doc = SimpleDocTemplate(buf, pagesize=letter)
         story = []
-        styles = getSampleStyleSheet()
+        styles = self._styles
         
         # Title
-        title_style = ParagraphStyle(
-            "CustomTitle",
-            parent=styles["Heading1"],
-            fontSize=24,
-            textColor=colors.HexColor("#0ea5e9"),
-            spaceAfter=30,
-            alignment=TA_CENTER,
-        )
-        story.append(Paragraph("Due Diligence Report", title_style))
+        story.append(Paragraph("Due Diligence Report", self._title_style))
         story.append(Spacer(1, 0.2 * inch))
         
         # Loan Information
@@ -50,21 +128,16 @@ class ReportGenerator:
         if analysis.risk_score is not None:
             story.append(Paragraph("Risk Assessment", styles["Heading2"]))
             risk_color = (
-                colors.red
+                "red"
                 if analysis.risk_score >= 70
-                else colors.orange
+                else "orange"
                 if analysis.risk_score >= 40
-                else colors.green
+                else "green"
             )
             story.append(
                 Paragraph(
                     f"Overall Risk Score: <b>{analysis.risk_score}/100</b>",
-                    ParagraphStyle(
-                        "RiskScore",
-                        parent=styles["Normal"],
-                        textColor=risk_color,
-                        fontSize=16,
-                    ),
+                    self._risk_score_styles[risk_color],
                 )
             )
             
@@ -77,27 +150,16 @@ class ReportGenerator:
                     ["Operational Risk", f"{breakdown.get('operational_risk', 0)}/100"],
                 ]
                 risk_table = Table(risk_data, colWidths=[3 * inch, 2 * inch])
-                risk_table.setStyle(
-                    TableStyle(
-                        [
-                            ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                            ("FONTSIZE", (0, 0), (-1, 0), 12),
-                            ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                            ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-                            ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                        ]
-                    )
-                )
+                risk_table.setStyle(self._risk_table_style)
                 story.append(risk_table)
             story.append(Spacer(1, 0.3 * inch))
         
         # Compliance Checks
         if analysis.compliance_checks:
             story.append(Paragraph("Compliance Checklist", styles["Heading2"]))
-            for check in analysis.compliance_checks:
+            rows = [["Category", "Status", "Description", "Details"]]
+            row_styles = []
+            for i, check in enumerate(analysis.compliance_checks, 1):
                 status_color = (
                     colors.green
                     if check["status"] == "pass"
@@ -105,21 +167,21 @@ class ReportGenerator:
                     if check["status"] == "fail"
                     else colors.orange
                 )
-                status_text = check["status"].upper()
-                story.append(
-                    Paragraph(
-                        f"<b>{check['category']}</b> - <font color='{status_color.hex}'>[{status_text}]</font>",
-                        styles["Normal"],
-                    )
-                )
-                story.append(
-                    Paragraph(f"{check['description']}", styles["Normal"])
-                )
-                if check.get("details"):
-                    story.append(
-                        Paragraph(f"Details: {check['details']}", styles["Normal"])
-                    )
-                story.append(Spacer(1, 0.1 * inch))
+                row_styles.append(("TEXTCOLOR", (1, i), (1, i), status_color))
+                # Free-text columns stay Paragraphs so long text wraps within the cell
+                rows.append([
+                    check["category"],
+                    check["status"].upper(),
+                    Paragraph(f"{check['description']}", styles["Normal"]),
+                    Paragraph(f"{check['details']}", styles["Normal"]) if check.get("details") else "",
+                ])
+            compliance_table = Table(
+                rows, colWidths=[1.5 * inch, 0.8 * inch, 2.2 * inch, 2.0 * inch]
+            )
+            compliance_table.setStyle(
+                TableStyle(self._compliance_table_commands + row_styles)
+            )
+            story.append(compliance_table)
             story.append(Spacer(1, 0.2 * inch))
         
         # Extracted Terms
@@ -156,16 +218,18 @@ class ReportGenerator:
         story.append(
             Paragraph(
                 f"Generated by CrystalTrade on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                ParagraphStyle(
-                    "Footer",
-                    parent=styles["Normal"],
-                    fontSize=8,
-                    textColor=colors.grey,
-                    alignment=TA_CENTER,
-                ),
+                self._footer_style,
             )
         )
         
         doc.build(story)
+        
+        # Unique temp file per build, then an atomic rename into place
+        with tempfile.NamedTemporaryFile(
+            dir=self.reports_dir, suffix=".tmp", delete=False
+        ) as tmp:
+            tmp.write(buf.getvalue())
+        os.replace(tmp.name, filepath)
+        
         return filepath
 
@@ -2,12 +2,58 @@
 Trade Readiness Score Engine
 Computes a 0-100 score and Green/Amber/Red label based on multiple factors
 """
-from typing import Dict, List, Any
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
+import re
 import uuid
 
+import numpy as np
+
+
+# Labels indexed by the label code _score_kernel returns
+_LABELS = ("Green", "Amber", "Red")
+
+
+def _score_kernel(sub_scores: np.ndarray, weights: np.ndarray):
+    """Return (score, label index) for one document's six sub-scores"""
+    # Round away float noise first so a sum that is exactly 75 isn't truncated to 74
+    total = round(float(sub_scores @ weights), 9)
+    score = max(0, min(100, int(total)))
+    
+    if score >= 75:
+        label_idx = 0
+    elif score >= 50:
+        label_idx = 1
+    else:
+        label_idx = 2
+    return score, label_idx
+
+
+def _score_kernel_batch(sub_scores: np.ndarray, weights: np.ndarray):
+    """Return (scores, label indices) as lists for an (N, 6) matrix of sub-scores"""
+    totals = np.round(sub_scores @ weights, 9)
+    scores = np.clip(np.trunc(totals), 0, 100).astype(np.int64)
+    # digitize gives 0 below 50, 1 for 50-74 and 2 from 75; label indices run the other way
+    label_idx = 2 - np.digitize(scores, (50, 75))
+    return scores.tolist(), label_idx.tolist()
+
 
 class TradeReadinessEngine:
+    # Key terms a complete credit agreement extraction should contain
+    _REQUIRED_TERMS = (
+        "interest_rate",
+        "maturity_date",
+        "principal_amount",
+        "transfer_restrictions",
+        "consent_requirements",
+        "financial_covenants",
+    )
+    
+    _UNUSUAL_INDICATORS = ("unusual", "non-standard", "atypical", "custom", "bespoke")
+    # Unusual-term indicators in one pass; they never overlap, so distinct matches = indicators present
+    _UNUSUAL_RE = re.compile("|".join(map(re.escape, _UNUSUAL_INDICATORS)))
+
     def __init__(self):
         self.weights = {
             "documentation_completeness": 0.20,
@@ -17,13 +63,24 @@ class TradeReadinessEngine:
             "non_standard_deviations": 0.15,
             "regulatory_flags": 0.05,
         }
+        # Weights in sub-score order, so the weighted score is one dot product
+        self._weight_keys = tuple(self.weights)
+        self._weights_vec = np.array(
+            [self.weights[k] for k in self._weight_keys], dtype=np.float64
+        )
 
     async def calculate_trade_readiness(
-        self, analysis_data: Dict, extracted_terms: Dict, compliance_checks: List[Dict]
+        self,
+        analysis_data: Dict,
+        extracted_terms: Dict,
+        compliance_checks: List[Dict],
+        collect_evidence: bool = True,
     ) -> Dict[str, Any]:
         """
         Calculate trade readiness score with explainable breakdown
         
+        Score-only callers can pass collect_evidence=False to skip building evidence_links.
+        
         Returns:
             {
                 "score": 0-100,
@@ -33,7 +90,67 @@ class TradeReadinessEngine:
                 "evidence_links": [...]
             }
         """
-        evidence_links = []
+        sub_scores, levels, evidence_links = self._assess_all(
+            analysis_data, extracted_terms, compliance_checks, collect_evidence
+        )
+        
+        # Calculate weighted score
+        score, label_idx = _score_kernel(
+            np.array(sub_scores, dtype=np.float64), self._weights_vec
+        )
+        
+        # Calculate confidence based on data quality
+        confidence = self._calculate_confidence(extracted_terms, compliance_checks)
+        
+        return self._build_result(
+            sub_scores, levels, score, _LABELS[label_idx], confidence, evidence_links
+        )
+
+    async def calculate_trade_readiness_batch(
+        self,
+        docs: List[Tuple[Dict, Dict, List[Dict]]],
+        collect_evidence: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Calculate trade readiness for many (analysis_data, extracted_terms, compliance_checks) documents
+        
+        Results match calculate_trade_readiness per document; the weighted scores and labels
+        for the whole batch come from one matrix-vector product.
+        """
+        if not docs:
+            return []
+        
+        assessed = [
+            self._assess_all(analysis_data, extracted_terms, compliance_checks, collect_evidence)
+            for analysis_data, extracted_terms, compliance_checks in docs
+        ]
+        sub_scores_mat = np.array([sub_scores for sub_scores, _, _ in assessed], dtype=np.float64)
+        scores, label_idx = _score_kernel_batch(sub_scores_mat, self._weights_vec)
+        
+        return [
+            self._build_result(
+                sub_scores,
+                levels,
+                score,
+                _LABELS[idx],
+                self._calculate_confidence(extracted_terms, compliance_checks),
+                evidence_links,
+            )
+            for (sub_scores, levels, evidence_links), score, idx, (_, extracted_terms, compliance_checks)
+            in zip(assessed, scores, label_idx, docs)
+        ]
+
+    def _assess_all(
+        self,
+        analysis_data: Dict,
+        extracted_terms: Dict,
+        compliance_checks: List[Dict],
+        collect_evidence: bool,
+    ):
+        """Run the six assessors; return (sub-scores, (friction, complexity), evidence_links)"""
+        # None tells each assessor not to record evidence
+        evidence_links = [] if collect_evidence else None
+        context = self._prepare_context(extracted_terms, compliance_checks, collect_evidence)
         
         # 1. Documentation Completeness (0-100)
         doc_completeness = self._assess_documentation_completeness(
@@ -41,15 +158,11 @@ class TradeReadinessEngine:
         )
         
         # 2. Transferability Friction (0-100, higher = more friction = worse)
-        transfer_friction = self._assess_transferability_friction(
-            extracted_terms, compliance_checks, evidence_links
-        )
+        transfer_friction = self._assess_transferability_friction(context, evidence_links)
         transfer_score = 100 - transfer_friction  # Invert: less friction = higher score
         
         # 3. Consent Complexity (0-100, higher complexity = worse)
-        consent_complexity = self._assess_consent_complexity(
-            extracted_terms, compliance_checks, evidence_links
-        )
+        consent_complexity = self._assess_consent_complexity(context, evidence_links)
         consent_score = 100 - consent_complexity
         
         # 4. Covenant Tightness / Headroom (0-100)
@@ -63,32 +176,37 @@ class TradeReadinessEngine:
         )
         
         # 6. Regulatory/Compliance Flags (0-100)
-        regulatory_score = self._assess_regulatory_flags(
-            compliance_checks, evidence_links
-        )
-        
-        # Calculate weighted score
-        score = (
-            doc_completeness * self.weights["documentation_completeness"] +
-            transfer_score * self.weights["transferability_friction"] +
-            consent_score * self.weights["consent_complexity"] +
-            covenant_score * self.weights["covenant_tightness"] +
-            deviation_score * self.weights["non_standard_deviations"] +
-            regulatory_score * self.weights["regulatory_flags"]
+        regulatory_score = self._assess_regulatory_flags(context, evidence_links)
+        
+        sub_scores = (
+            doc_completeness,
+            transfer_score,
+            consent_score,
+            covenant_score,
+            deviation_score,
+            regulatory_score,
         )
-        
-        score = max(0, min(100, int(score)))
-        
-        # Determine label
-        if score >= 75:
-            label = "Green"
-        elif score >= 50:
-            label = "Amber"
-        else:
-            label = "Red"
-        
-        # Calculate confidence based on data quality
-        confidence = self._calculate_confidence(extracted_terms, compliance_checks)
+        return sub_scores, (transfer_friction, consent_complexity), evidence_links
+
+    def _build_result(
+        self,
+        sub_scores: Tuple,
+        levels: Tuple,
+        score: int,
+        label: str,
+        confidence: float,
+        evidence_links: Optional[List[Dict]],
+    ) -> Dict[str, Any]:
+        """Assemble the explainable score result from assessed sub-scores"""
+        (
+            doc_completeness,
+            transfer_score,
+            consent_score,
+            covenant_score,
+            deviation_score,
+            regulatory_score,
+        ) = sub_scores
+        transfer_friction, consent_complexity = levels
         
         return {
             "score": score,
@@ -128,11 +246,44 @@ class TradeReadinessEngine:
                 },
             },
             "confidence": confidence,
-            "evidence_links": evidence_links,
+            "evidence_links": evidence_links if evidence_links is not None else [],
+        }
+
+    def _prepare_context(
+        self, extracted_terms: Dict, compliance_checks: List[Dict], collect_evidence: bool = True
+    ) -> Dict[str, Any]:
+        """Read and normalize the fields shared by several assessors once per calculation"""
+        transfer_restrictions = extracted_terms.get("transfer_restrictions", "")
+        
+        consent_requirements = extracted_terms.get("consent_requirements", [])
+        if isinstance(consent_requirements, str):
+            consent_reqs = [consent_requirements] if consent_requirements else []
+        else:
+            consent_reqs = consent_requirements
+        
+        # Checks bucketed by (category, status), so each assessor rule is one lookup
+        compliance_by_cat_status = defaultdict(list)
+        for check in compliance_checks:
+            compliance_by_cat_status[(check.get("category"), check.get("status"))].append(check)
+        
+        return {
+            "transfer_restrictions": transfer_restrictions,
+            "transfer_restrictions_lower": (
+                transfer_restrictions.lower()
+                if isinstance(transfer_restrictions, str)
+                else str(transfer_restrictions).lower()
+            ),
+            "consent_reqs_list": consent_reqs,
+            "consent_text_lower": str(consent_requirements).lower(),
+            "compliance_by_cat_status": compliance_by_cat_status,
+            # Only the regulatory evidence entry reads the flat status list
+            "compliance_statuses": (
+                [check.get("status") for check in compliance_checks] if collect_evidence else None
+            ),
         }
 
     def _assess_documentation_completeness(
-        self, analysis_data: Dict, extracted_terms: Dict, evidence_links: List[Dict]
+        self, analysis_data: Dict, extracted_terms: Dict, evidence_links: Optional[List[Dict]]
     ) -> int:
         """Assess documentation completeness (0-100)"""
         score = 50  # Base score
@@ -143,47 +294,40 @@ class TradeReadinessEngine:
             score += 20
         
         # Check for extracted key terms
-        required_terms = [
-            "interest_rate",
-            "maturity_date",
-            "principal_amount",
-            "transfer_restrictions",
-            "consent_requirements",
-            "financial_covenants",
-        ]
-        
-        extracted_count = sum(1 for term in required_terms if extracted_terms.get(term))
-        completeness_ratio = extracted_count / len(required_terms)
+        extracted_count = sum(1 for term in self._REQUIRED_TERMS if extracted_terms.get(term))
+        completeness_ratio = extracted_count / len(self._REQUIRED_TERMS)
         score += int(completeness_ratio * 30)
         
-        evidence_links.append({
-            "type": "documentation_completeness",
-            "document": analysis_data.get("document_path", ""),
-            "extracted_terms_count": extracted_count,
-            "total_required": len(required_terms),
-        })
+        if evidence_links is not None:
+            evidence_links.append({
+                "type": "documentation_completeness",
+                "document": analysis_data.get("document_path", ""),
+                "extracted_terms_count": extracted_count,
+                "total_required": len(self._REQUIRED_TERMS),
+            })
         
         return min(100, score)
 
     def _assess_transferability_friction(
-        self, extracted_terms: Dict, compliance_checks: List[Dict], evidence_links: List[Dict]
+        self, context: Dict, evidence_links: Optional[List[Dict]]
     ) -> int:
         """Assess transferability friction (0-100, higher = more friction)"""
         friction = 0
         
         # Check transfer restrictions
-        transfer_restrictions = extracted_terms.get("transfer_restrictions", "")
+        transfer_restrictions = context["transfer_restrictions"]
+        tr_lower = context["transfer_restrictions_lower"]
         if transfer_restrictions:
-            if "prohibited" in transfer_restrictions.lower():
+            if "prohibited" in tr_lower:
                 friction += 40
-            elif "restricted" in transfer_restrictions.lower():
+            elif "restricted" in tr_lower:
                 friction += 25
-            elif "consent" in transfer_restrictions.lower():
+            elif "consent" in tr_lower:
                 friction += 15
         
         # Check assignment vs participation
-        assignment_allowed = "assignment" in str(extracted_terms.get("transfer_restrictions", "")).lower()
-        participation_allowed = "participation" in str(extracted_terms.get("transfer_restrictions", "")).lower()
+        assignment_allowed = "assignment" in tr_lower
+        participation_allowed = "participation" in tr_lower
         
         if not assignment_allowed and not participation_allowed:
             friction += 30
@@ -191,35 +335,32 @@ class TradeReadinessEngine:
             friction += 20  # Assignment typically preferred
         
         # Check compliance checks
-        for check in compliance_checks:
-            if check.get("category") == "Transfer Restrictions" and check.get("status") == "fail":
-                friction += 20
+        friction += 20 * len(context["compliance_by_cat_status"].get(("Transfer Restrictions", "fail"), ()))
         
-        evidence_links.append({
-            "type": "transferability_friction",
-            "transfer_restrictions": transfer_restrictions,
-            "assignment_allowed": assignment_allowed,
-            "participation_allowed": participation_allowed,
-        })
+        if evidence_links is not None:
+            evidence_links.append({
+                "type": "transferability_friction",
+                "transfer_restrictions": transfer_restrictions,
+                "assignment_allowed": assignment_allowed,
+                "participation_allowed": participation_allowed,
+            })
         
         return min(100, friction)
 
     def _assess_consent_complexity(
-        self, extracted_terms: Dict, compliance_checks: List[Dict], evidence_links: List[Dict]
+        self, context: Dict, evidence_links: Optional[List[Dict]]
     ) -> int:
         """Assess consent complexity (0-100, higher = more complex)"""
         complexity = 0
         
-        consent_reqs = extracted_terms.get("consent_requirements", [])
-        if isinstance(consent_reqs, str):
-            consent_reqs = [consent_reqs] if consent_reqs else []
+        consent_reqs = context["consent_reqs_list"]
         
         # Number of parties requiring consent
         num_parties = len(consent_reqs)
         complexity += min(num_parties * 15, 40)
         
         # Check for specific consent requirements
-        consent_text = str(extracted_terms.get("consent_requirements", "")).lower()
+        consent_text = context["consent_text_lower"]
         if "borrower" in consent_text:
             complexity += 20
         if "agent" in consent_text:
@@ -228,20 +369,19 @@ class TradeReadinessEngine:
             complexity += 15
         
         # Check compliance
-        for check in compliance_checks:
-            if check.get("category") == "Consent Requirements" and check.get("status") == "warning":
-                complexity += 10
+        complexity += 10 * len(context["compliance_by_cat_status"].get(("Consent Requirements", "warning"), ()))
         
-        evidence_links.append({
-            "type": "consent_complexity",
-            "num_parties": num_parties,
-            "consent_requirements": consent_reqs,
-        })
+        if evidence_links is not None:
+            evidence_links.append({
+                "type": "consent_complexity",
+                "num_parties": num_parties,
+                "consent_requirements": consent_reqs,
+            })
         
         return min(100, complexity)
 
     def _assess_covenant_tightness(
-        self, extracted_terms: Dict, evidence_links: List[Dict]
+        self, extracted_terms: Dict, evidence_links: Optional[List[Dict]]
     ) -> int:
         """Assess covenant tightness/headroom (0-100, higher = more headroom = better)"""
         score = 70  # Base score assuming moderate covenants
@@ -258,9 +398,13 @@ class TradeReadinessEngine:
                 score = 65  # Many covenants
             else:
                 score = 50  # Very tight
+        else:
+            # Unparseable covenants keep the base score and contribute no data
+            covenants = []
+            num_covenants = 0
         
         # Check for current values vs requirements (if available)
-        for covenant in covenants if isinstance(covenants, list) else []:
+        for covenant in covenants:
             if isinstance(covenant, dict):
                 current = covenant.get("current_value")
                 requirement = covenant.get("requirement")
@@ -268,58 +412,66 @@ class TradeReadinessEngine:
                     # This would need actual financial data - placeholder logic
                     score += 5  # Having data is good
         
-        evidence_links.append({
-            "type": "covenant_tightness",
-            "num_covenants": len(covenants) if isinstance(covenants, list) else 0,
-        })
+        if evidence_links is not None:
+            evidence_links.append({
+                "type": "covenant_tightness",
+                "num_covenants": num_covenants,
+            })
         
         return min(100, max(0, score))
 
     def _assess_non_standard_deviations(
-        self, extracted_terms: Dict, evidence_links: List[Dict]
+        self, extracted_terms: Dict, evidence_links: Optional[List[Dict]]
     ) -> int:
         """Assess non-standard clause deviations (0-100, higher = fewer deviations = better)"""
         score = 80  # Base score
         
         # This would be enhanced by LMA deviation engine
         # For now, check for unusual terms
-        unusual_indicators = [
-            "unusual",
-            "non-standard",
-            "atypical",
-            "custom",
-            "bespoke",
-        ]
-        
-        terms_text = str(extracted_terms).lower()
-        deviation_count = sum(1 for indicator in unusual_indicators if indicator in terms_text)
+        found = set()
+        self._collect_unusual_indicators(extracted_terms, found)
+        deviation_count = len(found)
         
         score -= deviation_count * 10
         
-        evidence_links.append({
-            "type": "non_standard_deviations",
-            "deviation_indicators": deviation_count,
-        })
+        if evidence_links is not None:
+            evidence_links.append({
+                "type": "non_standard_deviations",
+                "deviation_indicators": deviation_count,
+            })
         
         return min(100, max(0, score))
 
+    def _collect_unusual_indicators(self, value: Any, found: set) -> None:
+        """Add unusual-term indicators found in string leaves of value, stopping once all are seen"""
+        # Only text values are scanned; keys, numbers and None can't mark a clause as non-standard
+        if isinstance(value, str):
+            found.update(self._UNUSUAL_RE.findall(value.lower()))
+            return
+        if isinstance(value, dict):
+            value = value.values()
+        elif not isinstance(value, (list, tuple)):
+            return
+        for item in value:
+            if len(found) == len(self._UNUSUAL_INDICATORS):
+                return
+            self._collect_unusual_indicators(item, found)
+
     def _assess_regulatory_flags(
-        self, compliance_checks: List[Dict], evidence_links: List[Dict]
+        self, context: Dict, evidence_links: Optional[List[Dict]]
     ) -> int:
         """Assess regulatory/compliance flags (0-100)"""
         score = 90  # Base score
         
-        for check in compliance_checks:
-            if check.get("category") == "Regulatory Compliance":
-                if check.get("status") == "fail":
-                    score -= 30
-                elif check.get("status") == "warning":
-                    score -= 15
+        by_cat_status = context["compliance_by_cat_status"]
+        score -= 30 * len(by_cat_status.get(("Regulatory Compliance", "fail"), ()))
+        score -= 15 * len(by_cat_status.get(("Regulatory Compliance", "warning"), ()))
         
-        evidence_links.append({
-            "type": "regulatory_flags",
-            "compliance_status": [c.get("status") for c in compliance_checks],
-        })
+        if evidence_links is not None:
+            evidence_links.append({
+                "type": "regulatory_flags",
+                "compliance_status": context["compliance_statuses"],
+            })
         
         return min(100, max(0, score))
 
@@ -330,16 +482,17 @@ class TradeReadinessEngine:
         confidence = 0.5  # Base confidence
         
         # More extracted terms = higher confidence
-        term_count = len([k for k, v in extracted_terms.items() if v])
+        term_count = sum(1 for v in extracted_terms.values() if v)
         if term_count >= 5:
             confidence += 0.2
         elif term_count >= 3:
             confidence += 0.1
         
         # More compliance checks = higher confidence
-        if len(compliance_checks) >= 5:
+        check_count = len(compliance_checks)
+        if check_count >= 5:
             confidence += 0.2
-        elif len(compliance_checks) >= 3:
+        elif check_count >= 3:
             confidence += 0.1
         
         return min(1.0, confidence)
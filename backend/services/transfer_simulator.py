@@ -2,11 +2,111 @@
 Transferability Simulator
 Simulates trade pathways (assignment vs participation) with consents, timeline, and blockers
 """
-from typing import Dict, List, Any
-from datetime import datetime, timedelta
+from collections import defaultdict
+from typing import Dict, List, Any, Optional
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import asyncio
+
+
+# Pathways simulated for every loan, in report order
+_PATHWAY_TYPES = ("assignment", "participation")
+
+# Playbook sections; only the header and the per-consent/per-blocker entries have fields to fill
+_PLAYBOOK_HEADER = """
+# {pathway_type_title} Transfer Playbook
+
+## Overview
+This playbook outlines the steps required to complete a {pathway_type} transfer for this loan position.
+
+## Estimated Timeline
+{timeline_days} business days from initiation to settlement.
+
+## Required Consents
+"""
+
+_PLAYBOOK_CONSENT = """
+- **{party}**: {description}
+  - Threshold: {threshold}
+  - Timing: {timing}
+  - Complexity: {complexity}
+"""
+
+_PLAYBOOK_BLOCKER = """
+- **{blocker_type}** ({severity}): {description}
+  - Mitigation: {mitigation}
+"""
+
+_PLAYBOOK_FOOTER = """
+## Key Steps
+1. Initiate transfer request with Agent
+2. Obtain required consents
+3. Complete due diligence checks
+4. Execute transfer documentation
+5. Coordinate settlement
+
+## Notes
+- Monitor timeline closely - delays in consent can extend timeline significantly
+- Maintain communication with Agent throughout process
+- Document all consents and approvals
+"""
+
+
+@lru_cache(maxsize=512)
+def _build_playbook_cached(
+    pathway_type: str, required_consents: tuple, blockers: tuple, timeline_days: int
+) -> str:
+    """Render a transfer playbook from consent and blocker field tuples"""
+    parts = [
+        _PLAYBOOK_HEADER.format(
+            pathway_type_title=pathway_type.title(),
+            pathway_type=pathway_type,
+            timeline_days=timeline_days,
+        )
+    ]
+    
+    if required_consents:
+        for party, description, threshold, timing, complexity in required_consents:
+            parts.append(_PLAYBOOK_CONSENT.format(
+                party=party,
+                description=description,
+                threshold=threshold,
+                timing=timing,
+                complexity=complexity,
+            ))
+    else:
+        parts.append("\n- No explicit consent requirements identified (verify with Agent)\n")
+    
+    parts.append("\n## Potential Blockers\n")
+    
+    if blockers:
+        for blocker_type, severity, description, mitigation in blockers:
+            parts.append(_PLAYBOOK_BLOCKER.format(
+                blocker_type=blocker_type,
+                severity=severity,
+                description=description,
+                mitigation=mitigation,
+            ))
+    else:
+        parts.append("\n- No critical blockers identified\n")
+    
+    parts.append(_PLAYBOOK_FOOTER)
+    
+    # Join once instead of growing the string with += (quadratic copying)
+    return "".join(parts).strip()
+
+
+def _normalize_consent_reqs(consent_reqs):
+    """Consent requirements as an iterable, with a single requirement string wrapped in a list"""
+    if isinstance(consent_reqs, str):
+        return [consent_reqs] if consent_reqs else []
+    return consent_reqs
 
 
 class TransferSimulator:
+    # Terms whose absence blocks a transfer until documentation is complete
+    _REQUIRED_TERMS = ("interest_rate", "maturity_date", "principal_amount")
+
     def __init__(self):
         self.base_timeline_days = {
             "assignment": 14,  # Base days for assignment
@@ -14,11 +114,17 @@ class TransferSimulator:
         }
 
     async def simulate_transfer_pathway(
-        self, analysis_id: str, extracted_terms: Dict, compliance_checks: List[Dict]
+        self,
+        analysis_id: str,
+        extracted_terms: Dict,
+        compliance_checks: List[Dict],
+        now: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Simulate transfer pathways for a loan
         
+        Bulk callers can pass a shared ISO timestamp as now for simulated_at.
+        
         Returns:
             {
                 "pathways": [
@@ -33,35 +139,50 @@ class TransferSimulator:
                 ]
             }
         """
-        pathways = []
-        
-        # Simulate Assignment pathway
-        assignment_pathway = await self._simulate_pathway(
-            "assignment", extracted_terms, compliance_checks
+        # Bucket checks by status once; every pathway reads the same buckets
+        checks_by_status = defaultdict(list)
+        for check in compliance_checks:
+            checks_by_status[check.get("status")].append(check)
+        
+        consent_reqs = _normalize_consent_reqs(extracted_terms.get("consent_requirements", []))
+        consent_reqs_lower = tuple(str(req).lower() for req in consent_reqs)
+        
+        # Pathways are independent. _simulate_pathway does no I/O today, so gather gives no speedup
+        # yet; it keeps latency at the slowest pathway once lookups or LLM calls are added
+        pathways = list(
+            await asyncio.gather(
+                *(
+                    self._simulate_pathway(
+                        pathway_type, extracted_terms, consent_reqs_lower, checks_by_status
+                    )
+                    for pathway_type in _PATHWAY_TYPES
+                )
+            )
         )
-        pathways.append(assignment_pathway)
         
-        # Simulate Participation pathway
-        participation_pathway = await self._simulate_pathway(
-            "participation", extracted_terms, compliance_checks
-        )
-        pathways.append(participation_pathway)
+        if now is None:
+            # Naive UTC, the same format utcnow() produced
+            now = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
         
         return {
             "pathways": pathways,
             "analysis_id": analysis_id,
-            "simulated_at": datetime.utcnow().isoformat(),
+            "simulated_at": now,
         }
 
     async def _simulate_pathway(
-        self, pathway_type: str, extracted_terms: Dict, compliance_checks: List[Dict]
+        self,
+        pathway_type: str,
+        extracted_terms: Dict,
+        consent_reqs_lower: tuple,
+        checks_by_status: Dict[str, List[Dict]],
     ) -> Dict[str, Any]:
         """Simulate a single pathway"""
         required_consents = self._identify_required_consents(
-            pathway_type, extracted_terms, compliance_checks
+            pathway_type, extracted_terms, consent_reqs_lower
         )
         
-        blockers = self._identify_blockers(pathway_type, extracted_terms, compliance_checks)
+        blockers = self._identify_blockers(pathway_type, extracted_terms, checks_by_status)
         
         timeline_days = self._estimate_timeline(
             pathway_type, required_consents, blockers
@@ -85,17 +206,13 @@ class TransferSimulator:
         }
 
     def _identify_required_consents(
-        self, pathway_type: str, extracted_terms: Dict, compliance_checks: List[Dict]
+        self, pathway_type: str, extracted_terms: Dict, consent_reqs_lower: tuple
     ) -> List[Dict]:
         """Identify required consents for the pathway"""
         consents = []
         
-        consent_reqs = extracted_terms.get("consent_requirements", [])
-        if isinstance(consent_reqs, str):
-            consent_reqs = [consent_reqs] if consent_reqs else []
-        
         # Check for Agent consent
-        if any("agent" in str(req).lower() for req in consent_reqs):
+        if any("agent" in req for req in consent_reqs_lower):
             consents.append({
                 "party": "Agent",
                 "required": True,
@@ -105,7 +222,7 @@ class TransferSimulator:
             })
         
         # Check for Borrower consent
-        if any("borrower" in str(req).lower() for req in consent_reqs):
+        if any("borrower" in req for req in consent_reqs_lower):
             consents.append({
                 "party": "Borrower",
                 "required": True,
@@ -138,7 +255,7 @@ class TransferSimulator:
         return consents
 
     def _identify_blockers(
-        self, pathway_type: str, extracted_terms: Dict, compliance_checks: List[Dict]
+        self, pathway_type: str, extracted_terms: Dict, checks_by_status: Dict[str, List[Dict]]
     ) -> List[Dict]:
         """Identify potential blockers"""
         blockers = []
@@ -164,18 +281,19 @@ class TransferSimulator:
                 })
         
         # Check compliance failures
-        for check in compliance_checks:
-            if check.get("status") == "fail":
-                blockers.append({
-                    "type": f"Compliance Issue: {check.get('category')}",
-                    "severity": "High",
-                    "description": check.get("description", ""),
-                    "mitigation": "Resolve compliance issue before proceeding",
-                })
+        # The "fail" bucket already holds exactly the failed checks, so there is nothing to filter
+        blockers.extend(
+            {
+                "type": f"Compliance Issue: {check.get('category')}",
+                "severity": "High",
+                "description": check.get("description", ""),
+                "mitigation": "Resolve compliance issue before proceeding",
+            }
+            for check in checks_by_status.get("fail", ())
+        )
         
         # Check for missing documentation
-        required_terms = ["interest_rate", "maturity_date", "principal_amount"]
-        missing_terms = [term for term in required_terms if not extracted_terms.get(term)]
+        missing_terms = [term for term in self._REQUIRED_TERMS if not extracted_terms.get(term)]
         if missing_terms:
             blockers.append({
                 "type": "Missing Documentation",
@@ -256,53 +374,30 @@ class TransferSimulator:
         self, pathway_type: str, required_consents: List[Dict], blockers: List[Dict], timeline_days: int
     ) -> str:
         """Generate text playbook"""
-        playbook = f"""
-# {pathway_type.title()} Transfer Playbook
-
-## Overview
-This playbook outlines the steps required to complete a {pathway_type} transfer for this loan position.
-
-## Estimated Timeline
-{timeline_days} business days from initiation to settlement.
-
-## Required Consents
-"""
-        
-        if required_consents:
-            for consent in required_consents:
-                playbook += f"""
-- **{consent.get('party')}**: {consent.get('description', 'Consent required')}
-  - Threshold: {consent.get('threshold', 'N/A')}
-  - Timing: {consent.get('timing', 'Before transfer')}
-  - Complexity: {consent.get('complexity', 'Medium')}
-"""
-        else:
-            playbook += "\n- No explicit consent requirements identified (verify with Agent)\n"
-        
-        playbook += "\n## Potential Blockers\n"
-        
-        if blockers:
-            for blocker in blockers:
-                playbook += f"""
-- **{blocker.get('type')}** ({blocker.get('severity')}): {blocker.get('description')}
-  - Mitigation: {blocker.get('mitigation')}
-"""
-        else:
-            playbook += "\n- No critical blockers identified\n"
-        
-        playbook += f"""
-## Key Steps
-1. Initiate transfer request with Agent
-2. Obtain required consents
-3. Complete due diligence checks
-4. Execute transfer documentation
-5. Coordinate settlement
-
-## Notes
-- Monitor timeline closely - delays in consent can extend timeline significantly
-- Maintain communication with Agent throughout process
-- Document all consents and approvals
-"""
-        
-        return playbook.strip()
-
+        # Playbook text depends only on these fields, so identical inputs reuse the cached text
+        consents_key = tuple(
+            (
+                consent.get("party"),
+                consent.get("description", "Consent required"),
+                consent.get("threshold", "N/A"),
+                consent.get("timing", "Before transfer"),
+                consent.get("complexity", "Medium"),
+            )
+            for consent in required_consents
+        )
+        blockers_key = tuple(
+            (
+                blocker.get("type"),
+                blocker.get("severity"),
+                blocker.get("description"),
+                blocker.get("mitigation"),
+            )
+            for blocker in blockers
+        )
+        try:
+            return _build_playbook_cached(pathway_type, consents_key, blockers_key, timeline_days)
+        except TypeError:
+            # Unhashable field values (e.g. a list description) can't be cached
+            return _build_playbook_cached.__wrapped__(
+                pathway_type, consents_key, blockers_key, timeline_days
+            )
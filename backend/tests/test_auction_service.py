@@ -0,0 +1,70 @@
+"""
+Winner and leaderboard parity against a plain Python reference
+"""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.auction_service import LEADERBOARD_SIZE, AuctionService
+
+
+def _bids(n, seed):
+    rng = random.Random(seed)
+    # Few distinct amounts so ties are common
+    return [
+        {
+            "id": f"bid-{i}",
+            "bidder_name": f"Bidder {i}",
+            "bid_amount": float(rng.randint(1, 20) * 1000),
+            "timestamp": f"2024-01-01T00:00:{i % 60:02d}",
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("auction_type", ["english", "sealed_bid"])
+@pytest.mark.parametrize("n", [1, 5, 25, 500])
+def test_winner_matches_reference(auction_type, n):
+    service = AuctionService()
+    bids = _bids(n, seed=n)
+    auction = {"auction_type": auction_type, "reserve_price": 0.0}
+
+    result = service.close_auction(auction, bids)
+    expected = max(bids, key=lambda b: b.get("bid_amount", 0.0))
+
+    assert result["winning_bid_id"] == expected["id"]
+    assert result["winning_amount"] == expected["bid_amount"]
+    assert type(result["winning_amount"]) is float
+
+
+@pytest.mark.parametrize("n", [0, 1, 5, 25, 500])
+def test_leaderboard_matches_reference(n):
+    service = AuctionService()
+    bids = _bids(n, seed=n)
+
+    leaderboard = service.get_auction_leaderboard({"auction_type": "english"}, bids)
+    expected = sorted(bids, key=lambda b: b.get("bid_amount", 0.0), reverse=True)[:LEADERBOARD_SIZE]
+
+    assert [entry["bidder_name"] for entry in leaderboard] == [b["bidder_name"] for b in expected]
+    assert [entry["bid_amount"] for entry in leaderboard] == [b["bid_amount"] for b in expected]
+    assert [entry["rank"] for entry in leaderboard] == list(range(1, len(expected) + 1))
+
+
+def test_placed_bids_do_not_add_cache_state_to_auction():
+    service = AuctionService()
+    auction = service.create_auction("a1", {"auction_type": "english"}, "creator")
+    bids = []
+    for amount in (100.0, 250.0, 175.0):
+        try:
+            bids.append(service.place_bid(auction["id"], "b", "Bidder", amount, auction, bids))
+        except ValueError:
+            pass
+
+    result = service.close_auction(auction, bids)
+
+    assert result["winning_amount"] == 250.0
+    assert not any(key.startswith("_") for key in auction)
@@ -0,0 +1,146 @@
+"""
+Parity tests for the lxml docx reader against python-docx, and pdfium thread safety
+"""
+import os
+import sys
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from docx import Document as DocxDocument
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import document_processor
+from services.document_processor import _extract_docx_text_xml, _extract_pdf_text_pdfium
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# Paragraphs exercising every construct the reader must treat like doc.paragraphs
+BODY_XML = (
+    # Plain runs, tabs, soft breaks, page break and non-breaking hyphen
+    '<w:p><w:r><w:t>Hello</w:t><w:tab/><w:t xml:space="preserve"> world</w:t></w:r>'
+    '<w:r><w:br/><w:t>line</w:t><w:br w:type="page"/><w:cr/><w:noBreakHyphen/></w:r></w:p>'
+    # Text box: mc:Choice and mc:Fallback copies nested inside a run
+    '<w:p><w:r><w:t>Before</w:t></w:r><w:r><mc:AlternateContent>'
+    '<mc:Choice Requires="wps"><w:drawing><wps:txbx><w:txbxContent>'
+    '<w:p><w:r><w:t>BOXTEXT</w:t></w:r></w:p></w:txbxContent></wps:txbx></w:drawing></mc:Choice>'
+    '<mc:Fallback><w:pict><v:textbox><w:txbxContent>'
+    '<w:p><w:r><w:t>BOXTEXT</w:t></w:r></w:p></w:txbxContent></v:textbox></w:pict></mc:Fallback>'
+    '</mc:AlternateContent></w:r></w:p>'
+    # Tracked insertion and hyperlink runs
+    '<w:p><w:r><w:t>Kept</w:t></w:r><w:ins w:id="1" w:author="a"><w:r><w:t> inserted</w:t></w:r></w:ins>'
+    '<w:hyperlink r:id="rId9"><w:r><w:t> link</w:t></w:r></w:hyperlink></w:p>'
+    # Empty paragraph
+    '<w:p/>'
+)
+
+
+def _build_docx(path):
+    """Write a docx whose body is BODY_XML"""
+    doc = DocxDocument()
+    doc.save(path)
+    with zipfile.ZipFile(path) as src:
+        entries = {name: src.read(name) for name in src.namelist()}
+    document_xml = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:document xmlns:w="{W_NS}"'
+        ' xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+        ' xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape"'
+        ' xmlns:v="urn:schemas-microsoft-com:vml"'
+        ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+        f' mc:Ignorable="wps"><w:body>{BODY_XML}<w:sectPr/></w:body></w:document>'
+    )
+    entries["word/document.xml"] = document_xml.encode()
+    with zipfile.ZipFile(path, "w") as dst:
+        for name, data in entries.items():
+            dst.writestr(name, data)
+
+
+@pytest.fixture
+def docx_path(tmp_path):
+    path = str(tmp_path / "sample.docx")
+    _build_docx(path)
+    return path
+
+
+def test_docx_xml_text_matches_python_docx(docx_path):
+    doc = DocxDocument(docx_path)
+    expected = "\n".join(paragraph.text for paragraph in doc.paragraphs)
+
+    assert _extract_docx_text_xml(docx_path) == expected
+
+
+def test_docx_xml_text_skips_nested_and_tracked_content(docx_path):
+    text = _extract_docx_text_xml(docx_path)
+
+    assert "BOXTEXT" not in text
+    assert "inserted" not in text
+    assert "Kept link" in text
+
+
+def test_docx_xml_parser_does_not_resolve_entities(tmp_path):
+    secret = tmp_path / "secret.txt"
+    secret.write_text("SECRET")
+    path = str(tmp_path / "xxe.docx")
+    _build_docx(path)
+    document_xml = (
+        f'<?xml version="1.0"?><!DOCTYPE w:document [<!ENTITY xxe SYSTEM "file://{secret}">]>'
+        f'<w:document xmlns:w="{W_NS}"><w:body><w:p><w:r><w:t>&xxe;</w:t></w:r></w:p></w:body></w:document>'
+    )
+    with zipfile.ZipFile(path) as src:
+        entries = {name: src.read(name) for name in src.namelist()}
+    entries["word/document.xml"] = document_xml.encode()
+    with zipfile.ZipFile(path, "w") as dst:
+        for name, data in entries.items():
+            dst.writestr(name, data)
+
+    assert "SECRET" not in _extract_docx_text_xml(path)
+
+
+def _build_pdf(path, pages=5):
+    """Write a small multi-page PDF with reportlab"""
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(path)
+    for number in range(pages):
+        pdf.drawString(72, 720, f"Page {number} facility agreement")
+        pdf.showPage()
+    pdf.save()
+
+
+def test_pdfium_extraction_is_serialized_across_threads(tmp_path, monkeypatch):
+    pdfium = pytest.importorskip("pypdfium2")
+    path = str(tmp_path / "sample.pdf")
+    _build_pdf(path)
+    expected = _extract_pdf_text_pdfium(path)
+
+    active = 0
+    max_active = 0
+    counter_lock = threading.Lock()
+    real_document = pdfium.PdfDocument
+
+    class TrackingDocument(real_document):
+        def __init__(self, *args, **kwargs):
+            nonlocal active, max_active
+            with counter_lock:
+                active += 1
+                max_active = max(max_active, active)
+            super().__init__(*args, **kwargs)
+
+        def close(self):
+            nonlocal active
+            super().close()
+            with counter_lock:
+                active -= 1
+
+    monkeypatch.setattr(document_processor.pdfium, "PdfDocument", TrackingDocument)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(_extract_pdf_text_pdfium, [path] * 32))
+
+    assert "Page 4 facility agreement" in expected
+    assert results == [expected] * 32
+    assert max_active == 1
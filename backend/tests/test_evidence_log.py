@@ -0,0 +1,48 @@
+"""
+Evidence lookups must accept records and plain dicts alike
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.evidence_log import EvidenceLogService
+
+
+def _mixed_logs(service):
+    records = [
+        service.log_evidence("a1", "d1", "Agreement.pdf", "text", 0.9, "covenant", "c1", page_number=3),
+        service.log_evidence("a1", "d1", "Agreement.pdf", "text", 0.5, "covenant", "c2"),
+        service.log_evidence("a1", "d1", "Agreement.pdf", "text", 0.9, "transfer", "c1"),
+    ]
+    # Same evidence as stored / serialized dicts
+    return records + [record.to_dict() for record in records]
+
+
+def test_get_evidence_for_feature_accepts_records_and_dicts():
+    service = EvidenceLogService()
+    logs = _mixed_logs(service)
+
+    found = service.get_evidence_for_feature("covenant", "c1", logs)
+
+    assert found == [logs[0], logs[3]]
+
+
+def test_build_index_accepts_records_and_dicts():
+    service = EvidenceLogService()
+    logs = _mixed_logs(service)
+
+    index = service.build_index(logs)
+
+    assert set(index) == {("covenant", "c1"), ("covenant", "c2"), ("transfer", "c1")}
+    for (feature_type, feature_id), entries in index.items():
+        assert entries == service.get_evidence_for_feature(feature_type, feature_id, logs)
+
+
+def test_format_citation_matches_for_record_and_dict():
+    service = EvidenceLogService()
+    logs = _mixed_logs(service)
+
+    for record, as_dict in zip(logs[:3], logs[3:]):
+        assert service.format_citation(record) == service.format_citation(as_dict)
+    assert service.format_citation(logs[1]) == "Document: Agreement.pdf | (Confidence: 50%)"
@@ -0,0 +1,70 @@
+"""
+Rule evaluation edge cases for the monitoring service
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.monitoring_service import MonitoringService
+
+
+def _rule(rule_id, threshold, current, **extra):
+    return {
+        "id": rule_id,
+        "analysis_id": "a1",
+        "rule_name": rule_id,
+        "threshold_value": threshold,
+        "current_value": current,
+        "alert_threshold": 0.9,
+        **extra,
+    }
+
+
+def test_rules_with_missing_values_are_not_evaluated():
+    rules = [
+        _rule("no_threshold", None, 2.0),
+        _rule("no_current", 3.0, None),
+        _rule("both_missing", None, None),
+        _rule("breached", 3.0, 3.5),
+    ]
+
+    alerts = asyncio.run(MonitoringService().check_rules(rules))
+
+    assert [alert["rule_id"] for alert in alerts] == ["breached"]
+    assert alerts[0]["alert_type"] == "critical"
+    assert "None" not in alerts[0]["message"]
+
+
+def test_check_rules_alert_levels():
+    rules = [
+        _rule("ok", 3.0, 1.0),
+        _rule("warning", 3.0, 2.8),
+        _rule("critical", 3.0, 3.0),
+        _rule("zero_threshold", 0.0, 1.0),
+        _rule("inactive", 3.0, 9.0, is_active=False),
+    ]
+
+    alerts = asyncio.run(MonitoringService().check_rules(rules))
+
+    assert {alert["rule_id"]: alert["alert_type"] for alert in alerts} == {
+        "warning": "warning",
+        "critical": "critical",
+        "zero_threshold": "critical",
+    }
+
+
+def test_extract_rules_handles_mixed_key_types_and_repeated_names():
+    covenant = {"name": "Leverage", "requirement": "Not to exceed 3.0:1.0", "current_value": "2.5"}
+    terms = {
+        "financial_covenants": [covenant, dict(covenant), "not a covenant"],
+        "maturity_date": "2030-01-01",
+        1: "non-string key",
+    }
+
+    rules = asyncio.run(MonitoringService().extract_monitoring_rules_from_analysis("a1", terms))
+
+    assert [rule["rule_type"] for rule in rules] == ["covenant", "covenant", "date"]
+    assert [(rule["threshold_value"], rule["current_value"]) for rule in rules[:2]] == [(3.0, 2.5)] * 2
+    assert len({rule["id"] for rule in rules}) == 3
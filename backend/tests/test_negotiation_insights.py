@@ -0,0 +1,64 @@
+"""
+Compiled negotiation triggers against the keyword lists they are built from
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.negotiation_insights import NegotiationInsightsGenerator
+
+
+CLAUSES = [
+    "",
+    "Transfers are PROHIBITED without approval",
+    "Assignment restricted to Eligible Institutions",
+    "Lender Requires Consent of the Agent",
+    "Borrower must obtain written approval",
+    "Transfers may require notice",
+    "Subject to the Agent's discretion",
+    "at discretion of the Majority Lenders",
+    "Freely transferable",
+    "requires  consent",
+    "mustobtain",
+    "restricted; subject to consent",
+]
+
+
+def _reference_likelihood(triggers, clause_text, default):
+    """Substring loop over the trigger lists, as the patterns replace"""
+    text = clause_text.lower()
+    if any(keyword in text for keyword in triggers["high_likelihood"]):
+        return "high"
+    if default == "low" and any(keyword in text for keyword in triggers["medium_likelihood"]):
+        return "medium"
+    return default
+
+
+@pytest.mark.parametrize("clause_text", CLAUSES)
+def test_compiled_triggers_match_keyword_lists(clause_text):
+    generator = NegotiationInsightsGenerator()
+    triggers = generator.negotiation_triggers
+    text = clause_text.lower()
+
+    assert bool(generator._high_re.search(clause_text)) == any(k in text for k in triggers["high_likelihood"])
+    assert bool(generator._med_re.search(clause_text)) == any(k in text for k in triggers["medium_likelihood"])
+    for default in ("low", "medium", "high"):
+        assert generator._trigger_likelihood(clause_text, default) == _reference_likelihood(
+            triggers, clause_text, default
+        )
+
+
+def test_consent_likelihood_raised_by_high_trigger():
+    generator = NegotiationInsightsGenerator()
+    plain = {"consent_requirements": ["Lender", "Administrative Agent", "Borrower"]}
+    triggered = {"consent_requirements": ["Lender", "Agent", "Borrower must obtain Agent approval"]}
+
+    plain_insights = asyncio.run(generator.generate_insights("a1", plain, []))["insights"]
+    triggered_insights = asyncio.run(generator.generate_insights("a1", triggered, []))["insights"]
+
+    assert [i["negotiation_likelihood"] for i in plain_insights] == ["medium"]
+    assert [i["negotiation_likelihood"] for i in triggered_insights] == ["high"]
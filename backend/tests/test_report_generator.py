@@ -0,0 +1,58 @@
+"""
+Tests for the content-addressed report cache
+"""
+import asyncio
+import os
+import sys
+import types
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.report_generator import ReportGenerator
+
+
+def _analysis(analysis_id="a1", updated_at=datetime(2024, 1, 2)):
+    return types.SimpleNamespace(
+        id=analysis_id,
+        loan_name="Loan A",
+        created_at=datetime(2024, 1, 1),
+        updated_at=updated_at,
+        risk_score=75,
+        risk_breakdown={"credit_risk": 10, "legal_risk": 20},
+        compliance_checks=[{"category": "C", "status": "pass", "description": "d", "details": "x"}],
+        extracted_terms={"interest_rate": "5%", "maturity_date": "2030", "principal_amount": "$1M"},
+        recommendations=["r1"],
+    )
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return ReportGenerator()
+
+
+def test_cache_hit_returns_existing_file_without_rebuilding(generator, monkeypatch):
+    analysis = _analysis()
+    first = asyncio.run(generator.generate_report(analysis))
+
+    def fail_build(*args):
+        raise AssertionError("cached report was rebuilt")
+
+    monkeypatch.setattr(generator, "_build_pdf", fail_build)
+    second = asyncio.run(generator.generate_report(analysis))
+
+    assert second == first
+    assert os.path.getsize(first) > 1000
+
+
+def test_new_version_renders_new_file_and_keeps_older_reports(generator):
+    old = asyncio.run(generator.generate_report(_analysis(updated_at=datetime(2024, 1, 2))))
+    new = asyncio.run(generator.generate_report(_analysis(updated_at=datetime(2024, 2, 2))))
+    other = asyncio.run(generator.generate_report(_analysis(analysis_id="a2")))
+
+    assert len({old, new, other}) == 3
+    # Report rows keep pointing at older files, so none may be deleted
+    assert all(os.path.exists(path) for path in (old, new, other))